@@ -1,259 +1,123 @@
 import streamlit as st
 import pandas as pd
-import io
-import plotly.graph_objects as go
-import plotly.express as px
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, KeepTogether, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from datetime import datetime
+from concurrent.futures import wait
+import os
+from utils.cards import REPORT_CSS, kpi_grid_html
+from utils.charts import CHART_MODES, CHART_MODE_LABELS, MAX_CHART_KPIS, department_comparison_figures, trend_figure
+from utils.comparison import COMPARISON_CSV_COLUMNS, compare_periods
+from utils.diagnostics import StageTimer
+from utils.exports import ExportCache
+from utils.ingest import IngestionCache, MissingColumnsError, DEFAULT_CACHE_BUDGET_BYTES, fingerprint_files
+from utils.memo import ResultMemo
+from utils.pagination import DEFAULT_DEPARTMENTS_PER_PAGE, DEPARTMENTS_PER_PAGE, department_kpi_counts, department_pages
+from utils.rollups import MONTH_NAMES, period_name, value_type_label
+from utils.schema import SchemaMismatchError
+from utils.search import MAX_KPI_OPTIONS, KPIFilter
+from utils.sqlite_store import SQLITE_PATH, KPIStore
+from utils.trends import (CHANGE_BASES, CHANGE_BASIS_LABELS, DEFAULT_TREND_PERIODS, TREND_CSV_COLUMNS,
+                          compare_trend, trend_csv_frame, trend_periods)
+from utils.validation import CHECK_LABELS, MAX_REPORTED_ROWS, error_count
 
-def create_pdf_report(filtered_data, period_name, value_type):
-    """Generate a high-quality PDF report with proper page breaks"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=50, bottomMargin=50)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle', 
-        parent=styles['Heading1'],
-        fontSize=22,
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#00D4AA'),
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'], 
-        fontSize=14,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#666666')
-    )
-    
-    dept_style = ParagraphStyle(
-        'DeptHeader',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=8,
-        spaceBefore=15,
-        textColor=colors.HexColor('#00D4AA'),
-        fontName='Helvetica-Bold',
-        alignment=TA_CENTER,
-        backColor=colors.HexColor('#E6FFFA'),
-        borderWidth=2,
-        borderColor=colors.HexColor('#00D4AA'),
-        borderPadding=10,
-        borderRadius=5
-    )
-    
-    # Add title and header
-    title = Paragraph("KPI Dashboard Report", title_style)
-    elements.append(title)
-    
-    # Add subtitle with period info
-    subtitle_text = f"{period_name}<br/><font color='#888888' size='11'>{value_type} | Generated: {datetime.now().strftime('%B %d, %Y at %H:%M')}</font>"
-    subtitle = Paragraph(subtitle_text, subtitle_style)
-    elements.append(subtitle)
-    
-    # Group by department
-    departments = filtered_data['department'].unique()
-    
-    for i, dept in enumerate(sorted(departments)):
-        dept_data = filtered_data[filtered_data['department'] == dept]
-        
-        # Create department section elements
-        dept_elements = []
-        
-        # Department header
-        dept_header = Paragraph(f"{dept} Department", dept_style)
-        dept_elements.append(dept_header)
-        dept_elements.append(Spacer(1, 10))
-        
-        # Create table data for this department
-        table_data = [['KPI Name', 'Value']]  # Header row
-        
-        for _, row in dept_data.iterrows():
-            table_data.append([row['kpi_name'], f"{row['value']:.2f}"])
-        
-        # Create table with improved styling
-        table = Table(table_data, colWidths=[4*inch, 1.5*inch], repeatRows=1)
-        table.setStyle(TableStyle([
-            # Header styling
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#00D4AA')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),  # Right align values
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            
-            # Data rows styling
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#DDDDDD')),
-            
-            # Alternating row colors
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8FAFC')]),
-            
-            # Padding
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('LEFTPADDING', (0, 0), (-1, -1), 15),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-            
-            # Header specific styling
-            ('TOPPADDING', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ]))
-        
-        dept_elements.append(table)
-        
-        # Keep department header and table together
-        dept_section = KeepTogether(dept_elements)
-        elements.append(dept_section)
-        
-        # Add space between departments (but not after the last one)
-        if i < len(departments) - 1:
-            elements.append(Spacer(1, 25))
-    
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+# ReportLab is only imported once a PDF is actually requested, not at app start
+def build_pdf_report(*args):
+    from utils.pdf_reports import create_pdf_report
+    return create_pdf_report(*args)
 
-def create_comparison_pdf(comparison_data, period_1_name, period_2_name):
-    """Generate a high-quality PDF comparison report"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=50, bottomMargin=50)
-    
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle', 
-        parent=styles['Heading1'],
-        fontSize=22,
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#00D4AA'),
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'], 
-        fontSize=14,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#666666')
-    )
-    
-    dept_style = ParagraphStyle(
-        'DeptHeader',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=8,
-        spaceBefore=15,
-        textColor=colors.HexColor('#00D4AA'),
-        fontName='Helvetica-Bold',
-        alignment=TA_CENTER,
-        backColor=colors.HexColor('#E6FFFA'),
-        borderWidth=2,
-        borderColor=colors.HexColor('#00D4AA'),
-        borderPadding=10
-    )
-    
-    # Add title and header
-    title = Paragraph("KPI Comparison Report", title_style)
-    elements.append(title)
-    
-    subtitle_text = f"{period_1_name} vs {period_2_name}<br/><font color='#888888' size='11'>Generated: {datetime.now().strftime('%B %d, %Y at %H:%M')}</font>"
-    subtitle = Paragraph(subtitle_text, subtitle_style)
-    elements.append(subtitle)
-    
-    # Group by department
-    departments = comparison_data['department'].unique()
-    
-    for i, dept in enumerate(sorted(departments)):
-        dept_data = comparison_data[comparison_data['department'] == dept]
-        
-        # Create department section elements
-        dept_elements = []
-        
-        # Department header
-        dept_header = Paragraph(f"{dept} Department", dept_style)
-        dept_elements.append(dept_header)
-        dept_elements.append(Spacer(1, 10))
-        
-        # Create comparison table
-        table_data = [['KPI Name', period_1_name, period_2_name, 'Change %']]
-        
-        for _, row in dept_data.iterrows():
-            change_pct = row['change_percent']
-            change_text = f"{change_pct:+.1f}%" if pd.notna(change_pct) else "N/A"
-            table_data.append([
-                row['kpi_name'], 
-                f"{row['period_1_value']:.2f}",
-                f"{row['period_2_value']:.2f}", 
-                change_text
-            ])
-        
-        # Create table with improved styling
-        table = Table(table_data, colWidths=[2.2*inch, 1.2*inch, 1.2*inch, 1*inch], repeatRows=1)
-        table.setStyle(TableStyle([
-            # Header styling
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#00D4AA')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),  # Right align values
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            
-            # Data rows styling
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#DDDDDD')),
+def build_comparison_pdf(*args):
+    from utils.pdf_reports import create_comparison_pdf
+    return create_comparison_pdf(*args)
+
+@st.fragment
+def render_downloads(downloads):
+    """
+    Download buttons whose artifacts are built lazily in the background.
+
+    Runs as a fragment, so clicking a button only reruns this block and the
+    report above stays on screen (and interactive) while an export builds.
+    """
+    export_cache = get_export_cache()
+    cols = st.columns(len(downloads))
+    
+    for col, export in zip(cols, downloads):
+        with col:
+            future = export_cache.get(export['key'])
+            built_now = future is None or not future.done()
+            if future is None:
+                if not st.button(export['prepare_label'], key=f"prepare_{export['key']}"):
+                    continue
+                future = export_cache.submit(export['key'], export['builder'], *export['args'])
             
-            # Alternating row colors
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8FAFC')]),
+            if not future.done():
+                with st.spinner(f"Building {export['kind']}..."):
+                    wait([future])
             
-            # Padding
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ]))
-        
-        dept_elements.append(table)
-        
-        # Keep department section together
-        dept_section = KeepTogether(dept_elements)
-        elements.append(dept_section)
-        
-        # Add space between departments
-        if i < len(departments) - 1:
-            elements.append(Spacer(1, 25))
-    
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+            if future.exception() is not None:
+                st.error(f"Export failed: {future.exception()}")
+                export_cache.discard(export['key'])
+            else:
+                if diagnostics.enabled:
+                    build_seconds = export_cache.build_seconds(export['key'])
+                    if built_now and build_seconds is not None:
+                        # Built on a worker thread, so recorded here rather than with a span. Only this
+                        # fragment reruns and the panel is already drawn, so the next full run shows it
+                        build = {'stage': f"{export['kind'].lower()}_build", 'seconds': build_seconds,
+                                 'bytes': len(future.result()), 'detail': export['file_name']}
+                        diagnostics.add(**build)
+                        st.session_state.setdefault('export_builds', []).append(build)
+                    if build_seconds is not None:
+                        st.caption(f"Built in {build_seconds:.2f}s · {len(future.result()) / 1024:.0f} KB")
+                st.download_button(
+                    label=export['label'],
+                    data=future.result(),
+                    file_name=export['file_name'],
+                    mime=export['mime'],
+                    type="secondary",
+                    key=f"download_{export['key']}"
+                )
 
-def comparison_function(df):
+def select_department_page(kpi_counts, key):
+    """Page controls for a department list; returns the departments of the selected page"""
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        per_page = st.selectbox(
+            "Departments per page",
+            DEPARTMENTS_PER_PAGE,
+            index=DEPARTMENTS_PER_PAGE.index(DEFAULT_DEPARTMENTS_PER_PAGE),
+            key=f"{key}_page_size"
+        )
+    pages = department_pages(kpi_counts, per_page)
+    page = 1
+    if len(pages) > 1:
+        with col2:
+            page = st.selectbox(
+                "Page",
+                range(1, len(pages) + 1),
+                format_func=lambda i: f"{i} of {len(pages)}: {pages[i - 1][0]} - {pages[i - 1][-1]}",
+                key=f"{key}_page"
+            )
+    st.caption(f"Showing {len(pages[page - 1])} of {len(kpi_counts)} departments")
+    return pages[page - 1]
+
+def select_kpi_filter(dataset):
+    """Department / KPI filter controls; returns the KPIFilter every view applies before aggregating"""
+    kpi_index = dataset.kpi_index
+    with st.expander("🔍 Filter departments and KPIs"):
+        departments = st.multiselect("Departments", kpi_index.departments, key="filter_departments")
+        query = st.text_input("Search KPI names", key="filter_query",
+                              help="Case-insensitive substring; without selected KPIs, every matching KPI is shown")
+        # Options come from the prebuilt index; previously selected names stay selectable
+        options = kpi_index.kpi_options(departments, query)
+        selected = st.session_state.get('filter_kpis', [])
+        if len(options) > MAX_KPI_OPTIONS:
+            st.caption(f"{len(options)} KPIs match; showing the first {MAX_KPI_OPTIONS}, refine the search to narrow them")
+            options = options[:MAX_KPI_OPTIONS]
+        kept = set(options)
+        options = options + [name for name in selected if name not in kept]
+        kpi_names = st.multiselect("KPIs", options, key="filter_kpis")
+    return KPIFilter(tuple(departments), tuple(kpi_names), query.strip())
+
+def comparison_function(dataset, kpi_filter):
     """Comparison function that compares KPIs between two different periods"""
     
     st.header("📊 Period Comparison")
@@ -265,28 +129,41 @@ def comparison_function(df):
         format_func=lambda x: x.replace('_', ' ').title()
     )
     
+    comparison_mode = st.radio(
+        "Compare",
+        ["pair", "trend"],
+        format_func=lambda x: "Two periods" if x == "pair" else "Trend over several periods",
+        horizontal=True
+    )
+    if comparison_mode == "trend":
+        trend_function(dataset, comparison_type, kpi_filter)
+        return
+    
+    chart_mode = st.radio(
+        "Chart Layout",
+        CHART_MODES,
+        format_func=lambda x: CHART_MODE_LABELS[x],
+        horizontal=True
+    )
+    
     # Create two columns for period selection
     col1, col2 = st.columns(2)
     
-    month_names = {1: 'January', 2: 'February', 3: 'March', 4: 'April',
-                   5: 'May', 6: 'June', 7: 'July', 8: 'August', 
-                   9: 'September', 10: 'October', 11: 'November', 12: 'December'}
-    
     with col1:
         st.subheader("📅 First Period")
-        years = sorted(df['year'].unique())
+        years = dataset.index.years
         selected_year_1 = st.selectbox("Year", years, key="year1")
         
         if comparison_type == "monthly":
-            available_months = sorted(df[df['year'] == selected_year_1]['month'].unique())
+            available_months = dataset.index.months(selected_year_1)
             selected_period_1 = st.selectbox(
                 "Month", 
                 available_months,
-                format_func=lambda x: month_names[x],
+                format_func=lambda x: MONTH_NAMES[x],
                 key="month1"
             )
         elif comparison_type == "quarterly":
-            available_quarters = sorted(df[df['year'] == selected_year_1]['quarter'].unique())
+            available_quarters = dataset.index.quarters(selected_year_1)
             selected_period_1 = st.selectbox("Quarter", available_quarters, key="quarter1")
         elif comparison_type == "half_annual":
             selected_period_1 = st.selectbox(
@@ -303,15 +180,15 @@ def comparison_function(df):
         selected_year_2 = st.selectbox("Year", years, key="year2")
         
         if comparison_type == "monthly":
-            available_months = sorted(df[df['year'] == selected_year_2]['month'].unique())
+            available_months = dataset.index.months(selected_year_2)
             selected_period_2 = st.selectbox(
                 "Month", 
                 available_months,
-                format_func=lambda x: month_names[x],
+                format_func=lambda x: MONTH_NAMES[x],
                 key="month2"
             )
         elif comparison_type == "quarterly":
-            available_quarters = sorted(df[df['year'] == selected_year_2]['quarter'].unique())
+            available_quarters = dataset.index.quarters(selected_year_2)
             selected_period_2 = st.selectbox("Quarter", available_quarters, key="quarter2")
         elif comparison_type == "half_annual":
             selected_period_2 = st.selectbox(
@@ -323,197 +200,218 @@ def comparison_function(df):
         else:  # annually
             selected_period_2 = None
     
-    # Compare button
+    # The comparison stays up on later reruns (e.g. paging) until the selection changes
+    comparison_key = (dataset.fingerprint, comparison_type,
+                      selected_year_1, selected_period_1, selected_year_2, selected_period_2, kpi_filter)
     if st.button("Compare Periods", type="primary"):
-        # Helper function to get period data using same logic as report function
-        def get_period_data(comparison_type, selected_year, selected_period):
-            if comparison_type == "monthly":
-                filtered_data = df[(df['year'] == selected_year) & (df['month'] == selected_period)]
-                period_name = f"{month_names[selected_period]} {selected_year}"
-                
-            elif comparison_type == "quarterly":
-                filtered_data = df[(df['year'] == selected_year) & (df['quarter'] == selected_period)]
-                
-                # Group and calculate based on data type
-                result_data = []
-                for (dept, kpi), group in filtered_data.groupby(['department', 'kpi_name']):
-                    data_type = group['data_type'].iloc[0]
-                    if data_type == "percentage":
-                        value = group['value'].mean()
-                    else:
-                        value = group['value'].sum()
-                    result_data.append({'department': dept, 'kpi_name': kpi, 'value': value, 'data_type': data_type})
-                
-                filtered_data = pd.DataFrame(result_data)
-                period_name = f"Q{selected_period} {selected_year}"
-                
-            elif comparison_type == "half_annual":
-                if selected_period == 1:
-                    filtered_data = df[(df['year'] == selected_year) & (df['month'].isin([1,2,3,4,5,6]))]
-                else:
-                    filtered_data = df[(df['year'] == selected_year) & (df['month'].isin([7,8,9,10,11,12]))]
-                
-                # Group and calculate based on data type
-                result_data = []
-                for (dept, kpi), group in filtered_data.groupby(['department', 'kpi_name']):
-                    data_type = group['data_type'].iloc[0]
-                    if data_type == "percentage":
-                        value = group['value'].mean()
-                    else:
-                        value = group['value'].sum()
-                    result_data.append({'department': dept, 'kpi_name': kpi, 'value': value, 'data_type': data_type})
-                
-                filtered_data = pd.DataFrame(result_data)
-                period_name = f"{'First' if selected_period == 1 else 'Second'} Half {selected_year}"
-                
-            else:  # annually
-                filtered_data = df[df['year'] == selected_year]
-                
-                # Group and calculate based on data type
-                result_data = []
-                for (dept, kpi), group in filtered_data.groupby(['department', 'kpi_name']):
-                    data_type = group['data_type'].iloc[0]
-                    if data_type == "percentage":
-                        value = group['value'].mean()
-                    else:
-                        value = group['value'].sum()
-                    result_data.append({'department': dept, 'kpi_name': kpi, 'value': value, 'data_type': data_type})
-                
-                filtered_data = pd.DataFrame(result_data)
-                period_name = f"Year {selected_year}"
-            
-            return filtered_data, period_name
+        st.session_state['comparison_shown'] = comparison_key
+    if st.session_state.get('comparison_shown') == comparison_key:
+        # Each side is a single lookup into the precomputed rollup cube, filtered before comparing
+        departments, kpi_names = dataset.kpi_index.resolve(kpi_filter)
         
-        # Get data for both periods
-        data_1, period_1_name = get_period_data(comparison_type, selected_year_1, selected_period_1)
-        data_2, period_2_name = get_period_data(comparison_type, selected_year_2, selected_period_2)
+        def get_period_data(comparison_type, selected_year, selected_period):
+            filtered_data = dataset.period_data(comparison_type, selected_year, selected_period,
+                                                departments, kpi_names)
+            return filtered_data, period_name(comparison_type, selected_year, selected_period)
+        
+        def compute_comparison():
+            # Get data for both periods
+            data_1, period_1_name = get_period_data(comparison_type, selected_year_1, selected_period_1)
+            data_2, period_2_name = get_period_data(comparison_type, selected_year_2, selected_period_2)
+            if data_1.empty or data_2.empty:
+                return None, period_1_name, period_2_name
+            # Merge data for comparison and calculate percentage change
+            return compare_periods(data_1, data_2), period_1_name, period_2_name
+        
+        # Computed once per session and selection, then reused
+        with diagnostics.span("comparison") as span:
+            (comparison_data, period_1_name, period_2_name), hit = get_result_memo().get_or_compute(
+                (dataset.fingerprint, "comparison", comparison_type,
+                 selected_year_1, selected_period_1, selected_year_2, selected_period_2, kpi_filter),
+                compute_comparison
+            )
+            span.note("memo hit" if hit else "computed")
+            if comparison_data is not None:
+                span.frame(comparison_data)
         
-        if data_1.empty or data_2.empty:
+        if comparison_data is None:
             st.warning("No data found for one or both selected periods")
             return
         
-        # Merge data for comparison
-        comparison_data = data_1.merge(
-            data_2, 
-            on=['department', 'kpi_name'], 
-            suffixes=('_1', '_2'),
-            how='inner'
-        )
-        
         if comparison_data.empty:
             st.warning("No common KPIs found between the selected periods")
             return
         
-        # Rename columns for clarity
-        comparison_data = comparison_data.rename(columns={
-            'value_1': 'period_1_value',
-            'value_2': 'period_2_value'
-        })
-        
-        # Calculate percentage change
-        comparison_data['change_percent'] = ((comparison_data['period_2_value'] - comparison_data['period_1_value']) / 
-                                           comparison_data['period_1_value'].abs()) * 100
-        
         # Display results
         st.success("✅ Comparison Generated Successfully!")
         st.subheader(f"📊 Comparing: {period_1_name} vs {period_2_name}")
         
-        # Group by department and display
-        departments = comparison_data['department'].unique()
+        # Only one page of departments is rendered per run
+        departments = select_department_page(department_kpi_counts(comparison_data), "comparison")
         
-        for dept in sorted(departments):
-            dept_data = comparison_data[comparison_data['department'] == dept]
-            
-            # Modern department header
-            st.markdown(f'<div class="dept-header">🏢 {dept} Department</div>', unsafe_allow_html=True)
-            
-            # Create individual charts for each KPI in this department
-            for _, kpi_row in dept_data.iterrows():
-                kpi_name = kpi_row['kpi_name']
-                period_1_value = kpi_row['period_1_value']
-                period_2_value = kpi_row['period_2_value']
+        with diagnostics.span("render_charts", f"{len(departments)} departments"):
+            for dept in departments:
+                dept_data = comparison_data[comparison_data['department'] == dept]
                 
-                # Create individual KPI chart
-                fig = go.Figure()
+                # Modern department header
+                st.markdown(f'<div class="dept-header">🏢 {dept} Department</div>', unsafe_allow_html=True)
                 
-                # Add bar chart for comparison
-                fig.add_trace(go.Bar(
-                    x=[period_1_name, period_2_name],
-                    y=[period_1_value, period_2_value],
-                    marker_color=['#00D4AA', '#9C27B0'],
-                    text=[f'{period_1_value:.2f}', f'{period_2_value:.2f}'],
-                    textposition='auto',
-                    name=kpi_name
-                ))
+                # One figure per department (or per KPI if requested), capped for very large departments
+                figures, summarized = department_comparison_figures(dept_data, period_1_name, period_2_name, chart_mode)
+                if summarized:
+                    st.caption(f"{len(dept_data)} KPIs - showing change % only (values are in the table below)")
+                for fig in figures:
+                    st.plotly_chart(fig, use_container_width=True)
                 
-                # Calculate change for title
-                change_pct = kpi_row['change_percent']
-                change_text = f" ({change_pct:+.1f}%)" if pd.notna(change_pct) else ""
+                # Display comparison table
+                st.subheader(f"📋 {dept} Department - Detailed Comparison")
                 
-                # Update layout
-                fig.update_layout(
-                    title=f"{kpi_name}{change_text}",
-                    xaxis_title="Periods",
-                    yaxis_title="Value",
-                    height=300,
-                    showlegend=False,
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)'),
-                    yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
-                )
+                # Prepare table data
+                table_data = []
+                for _, row in dept_data.iterrows():
+                    change_pct = row['change_percent']
+                    change_display = f"{change_pct:+.1f}%" if pd.notna(change_pct) else "N/A"
+                    
+                    table_data.append({
+                        'KPI Name': row['kpi_name'],
+                        period_1_name: f"{row['period_1_value']:.2f}",
+                        period_2_name: f"{row['period_2_value']:.2f}",
+                        'Change %': change_display
+                    })
                 
-                st.plotly_chart(fig, use_container_width=True)
-            
-            # Display comparison table
-            st.subheader(f"📋 {dept} Department - Detailed Comparison")
-            
-            # Prepare table data
-            table_data = []
-            for _, row in dept_data.iterrows():
-                change_pct = row['change_percent']
-                change_display = f"{change_pct:+.1f}%" if pd.notna(change_pct) else "N/A"
+                # Display table
+                table_df = pd.DataFrame(table_data)
+                st.dataframe(table_df, use_container_width=True, hide_index=True)
                 
-                table_data.append({
-                    'KPI Name': row['kpi_name'],
-                    period_1_name: f"{row['period_1_value']:.2f}",
-                    period_2_name: f"{row['period_2_value']:.2f}",
-                    'Change %': change_display
-                })
-            
-            # Display table
-            table_df = pd.DataFrame(table_data)
-            st.dataframe(table_df, use_container_width=True, hide_index=True)
-            
-            st.markdown("<br>", unsafe_allow_html=True)
+                st.markdown("<br>", unsafe_allow_html=True)
         
-        # Add download section
+        # Add download section (artifacts are built only when requested)
         st.markdown("---")
-        col1, col2 = st.columns(2)
+        export_key = (dataset.fingerprint, "comparison", comparison_type,
+                      selected_year_1, selected_period_1, selected_year_2, selected_period_2, kpi_filter)
+        file_stem = f"KPI_Comparison_{period_1_name.replace(' ', '_')}_vs_{period_2_name.replace(' ', '_')}"
+        render_downloads([
+            {
+                'key': export_key + ("pdf",),
+                'kind': "PDF",
+                'prepare_label': "📄 Prepare PDF",
+                'label': "📄 Download PDF Comparison",
+                'builder': build_comparison_pdf,
+                'args': (comparison_data, period_1_name, period_2_name),
+                'file_name': f"{file_stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                'mime': "application/pdf",
+            },
+            {
+                'key': export_key + ("csv",),
+                'kind': "CSV",
+                'prepare_label': "📊 Prepare CSV",
+                'label': "📊 Download CSV Data",
+                'builder': lambda data: data.to_csv(index=False),
+                'args': (comparison_data[COMPARISON_CSV_COLUMNS],),
+                'file_name': f"{file_stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                'mime': "text/csv",
+            },
+        ])
+
+def trend_function(dataset, period_type, kpi_filter):
+    """Values and changes of every KPI over several periods of one type"""
+    
+    available_periods = trend_periods(dataset.period_keys(), period_type)
+    if len(available_periods) < 2:
+        st.info("At least two periods are needed for a trend")
+        return
+    
+    selected_periods = st.multiselect(
+        "Periods",
+        available_periods,
+        default=available_periods[-DEFAULT_TREND_PERIODS[period_type]:],
+        format_func=lambda p: period_name(period_type, *p),
+        key=f"trend_periods_{period_type}"
+    )
+    change_basis = st.radio(
+        "Change",
+        CHANGE_BASES,
+        format_func=lambda x: CHANGE_BASIS_LABELS[x],
+        horizontal=True
+    )
+    
+    # The trend stays up on later reruns (e.g. paging) until the selection changes
+    trend_key = (dataset.fingerprint, period_type, tuple(selected_periods), kpi_filter)
+    if st.button("Show Trend", type="primary"):
+        st.session_state['trend_shown'] = trend_key
+    if st.session_state.get('trend_shown') == trend_key:
+        if len(selected_periods) < 2:
+            st.warning("Select at least two periods")
+            return
         
-        with col1:
-            # Generate PDF
-            pdf_buffer = create_comparison_pdf(comparison_data, period_1_name, period_2_name)
-            st.download_button(
-                label="📄 Download PDF Comparison",
-                data=pdf_buffer,
-                file_name=f"KPI_Comparison_{period_1_name.replace(' ', '_')}_vs_{period_2_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                mime="application/pdf",
-                type="secondary"
+        # One aggregation and one pivot for all selected periods, over the filtered rows only
+        with diagnostics.span("aggregation", f"trend, {len(selected_periods)} periods") as span:
+            trend, hit = get_result_memo().get_or_compute(
+                (dataset.fingerprint, "trend", period_type, tuple(selected_periods), kpi_filter),
+                lambda: compare_trend(
+                    dataset.year_rows(min(selected_periods)[0], max(selected_periods)[0],
+                                      *dataset.kpi_index.resolve(kpi_filter)),
+                    period_type, selected_periods
+                )
             )
+            span.frame(trend['values'])
+            if hit:
+                span.note(f"trend, {len(selected_periods)} periods, memo hit")
+        values = trend['values']
+        if values.empty:
+            st.warning("No data found for the selected periods")
+            return
         
-        with col2:
-            # Generate CSV
-            csv_data = comparison_data[['department', 'kpi_name', 'period_1_value', 'period_2_value', 'change_percent']].to_csv(index=False)
-            st.download_button(
-                label="📊 Download CSV Data",
-                data=csv_data,
-                file_name=f"KPI_Comparison_{period_1_name.replace(' ', '_')}_vs_{period_2_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv",
-                type="secondary"
-            )
+        labels = trend['labels']
+        changes = trend[change_basis]
+        st.success("✅ Trend Generated Successfully!")
+        st.subheader(f"📈 Trend: {labels[0]} to {labels[-1]} ({len(labels)} periods)")
+        
+        value_format = {label: st.column_config.NumberColumn(format="%.2f") for label in labels}
+        change_format = {label: st.column_config.NumberColumn(format="%+.1f%%") for label in labels}
+        
+        # Only one page of departments is rendered per run
+        kpi_counts = department_kpi_counts(values.index.to_frame(index=False))
+        departments = select_department_page(kpi_counts, "trend")
+        
+        with diagnostics.span("render_charts", f"trend, {len(labels)} periods, {len(departments)} departments"):
+            for dept in departments:
+                dept_values = values.xs(dept, level='department', drop_level=False)
+                
+                # Modern department header
+                st.markdown(f'<div class="dept-header">🏢 {dept} Department</div>', unsafe_allow_html=True)
+                
+                if len(dept_values) > MAX_CHART_KPIS:
+                    st.caption(f"{len(dept_values)} KPIs - too many to chart (values are in the tables below)")
+                else:
+                    st.plotly_chart(trend_figure(dept_values), use_container_width=True)
+                
+                st.subheader(f"📋 {dept} Department - Values")
+                st.dataframe(dept_values.droplevel('department').rename_axis('KPI Name').reset_index(),
+                             column_config=value_format, use_container_width=True, hide_index=True)
+                st.subheader(f"📋 {dept} Department - Change % ({CHANGE_BASIS_LABELS[change_basis]})")
+                st.dataframe(changes.loc[dept_values.index].droplevel('department').rename_axis('KPI Name').reset_index(),
+                             column_config=change_format, use_container_width=True, hide_index=True)
+                
+                st.markdown("<br>", unsafe_allow_html=True)
+        
+        # Add download section (artifacts are built only when requested)
+        st.markdown("---")
+        file_stem = f"KPI_Trend_{labels[0].replace(' ', '_')}_to_{labels[-1].replace(' ', '_')}"
+        render_downloads([
+            {
+                'key': (dataset.fingerprint, "trend", period_type, tuple(selected_periods), kpi_filter, "csv"),
+                'kind': "CSV",
+                'prepare_label': "📊 Prepare CSV",
+                'label': "📊 Download CSV Data",
+                'builder': lambda trend: trend_csv_frame(trend)[TREND_CSV_COLUMNS].to_csv(index=False),
+                'args': (trend,),
+                'file_name': f"{file_stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                'mime': "text/csv",
+            },
+        ])
 
-def report_function(df):
+def report_function(dataset, kpi_filter):
     """Report function that displays KPIs grouped by department"""
     
     st.header("📊 Reports")
@@ -528,24 +426,21 @@ def report_function(df):
         )
     
     with col2:
-        # Get available years from data
-        years = sorted(df['year'].unique())
+        # Get available years from the precomputed period index
+        years = dataset.index.years
         selected_year = st.selectbox("Year", years)
     
     with col3:
         if period_type == "monthly":
             # Get available months for selected year
-            available_months = sorted(df[df['year'] == selected_year]['month'].unique())
-            month_names = {1: 'January', 2: 'February', 3: 'March', 4: 'April',
-                          5: 'May', 6: 'June', 7: 'July', 8: 'August', 
-                          9: 'September', 10: 'October', 11: 'November', 12: 'December'}
+            available_months = dataset.index.months(selected_year)
             selected_period = st.selectbox(
                 "Month", 
                 available_months,
-                format_func=lambda x: month_names[x]
+                format_func=lambda x: MONTH_NAMES[x]
             )
         elif period_type == "quarterly":
-            available_quarters = sorted(df[df['year'] == selected_year]['quarter'].unique())
+            available_quarters = dataset.index.quarters(selected_year)
             selected_period = st.selectbox("Quarter", available_quarters)
         elif period_type == "half_annual":
             selected_period = st.selectbox(
@@ -556,73 +451,22 @@ def report_function(df):
         else:  # annually
             selected_period = None
     
-    # Show Report button
+    # Show Report button; the report stays up on later reruns (e.g. paging) until the selection changes
+    report_key = (dataset.fingerprint, period_type, selected_year, selected_period, kpi_filter)
     if st.button("Show Report", type="primary"):
-        # Filter and calculate data based on selection
-        if period_type == "monthly":
-            # Get exact values for the specific month
-            filtered_data = df[(df['year'] == selected_year) & (df['month'] == selected_period)]
-            period_name = f"{month_names[selected_period]} {selected_year}"
-            value_type = "Exact values"
-            
-        elif period_type == "quarterly":
-            # Filter data for the quarter
-            filtered_data = df[(df['year'] == selected_year) & (df['quarter'] == selected_period)]
-            
-            # Group and calculate based on data type
-            result_data = []
-            for (dept, kpi), group in filtered_data.groupby(['department', 'kpi_name']):
-                data_type = group['data_type'].iloc[0]  # Assume same data_type for same KPI
-                if data_type == "percentage":
-                    value = group['value'].mean()  # Average for percentages
-                else:
-                    value = group['value'].sum()   # Sum for numbers
-                result_data.append({'department': dept, 'kpi_name': kpi, 'value': value, 'data_type': data_type})
-            
-            filtered_data = pd.DataFrame(result_data)
-            period_name = f"Q{selected_period} {selected_year}"
-            value_type = "Calculated values (avg for %, sum for numbers)"
-            
-        elif period_type == "half_annual":
-            # Filter data for the half year
-            if selected_period == 1:
-                # First half: months 1-6
-                filtered_data = df[(df['year'] == selected_year) & (df['month'].isin([1,2,3,4,5,6]))]
-            else:
-                # Second half: months 7-12
-                filtered_data = df[(df['year'] == selected_year) & (df['month'].isin([7,8,9,10,11,12]))]
-            
-            # Group and calculate based on data type
-            result_data = []
-            for (dept, kpi), group in filtered_data.groupby(['department', 'kpi_name']):
-                data_type = group['data_type'].iloc[0]  # Assume same data_type for same KPI
-                if data_type == "percentage":
-                    value = group['value'].mean()  # Average for percentages
-                else:
-                    value = group['value'].sum()   # Sum for numbers
-                result_data.append({'department': dept, 'kpi_name': kpi, 'value': value, 'data_type': data_type})
-            
-            filtered_data = pd.DataFrame(result_data)
-            period_name = f"{'First' if selected_period == 1 else 'Second'} Half {selected_year}"
-            value_type = "Calculated values (avg for %, sum for numbers)"
-            
-        else:  # annually
-            # Filter data for the entire year
-            filtered_data = df[df['year'] == selected_year]
-            
-            # Group and calculate based on data type
-            result_data = []
-            for (dept, kpi), group in filtered_data.groupby(['department', 'kpi_name']):
-                data_type = group['data_type'].iloc[0]  # Assume same data_type for same KPI
-                if data_type == "percentage":
-                    value = group['value'].mean()  # Average for percentages
-                else:
-                    value = group['value'].sum()   # Sum for numbers
-                result_data.append({'department': dept, 'kpi_name': kpi, 'value': value, 'data_type': data_type})
-            
-            filtered_data = pd.DataFrame(result_data)
-            period_name = f"Year {selected_year}"
-            value_type = "Calculated values (avg for %, sum for numbers)"
+        st.session_state['report_shown'] = report_key
+    if st.session_state.get('report_shown') == report_key:
+        # Look up the precomputed rollup for the selected period, keeping only the filtered KPIs
+        with diagnostics.span("aggregation") as span:
+            (filtered_data, period_label, value_type), hit = get_result_memo().get_or_compute(
+                (dataset.fingerprint, "report", period_type, selected_year, selected_period, kpi_filter),
+                lambda: (dataset.period_data(period_type, selected_year, selected_period,
+                                             *dataset.kpi_index.resolve(kpi_filter)),
+                         period_name(period_type, selected_year, selected_period),
+                         value_type_label(period_type))
+            )
+            span.frame(filtered_data)
+            span.note("report, memo hit" if hit else "report")
         
         # Check if data exists
         if filtered_data.empty:
@@ -631,96 +475,70 @@ def report_function(df):
         
         # Display report
         st.success("✅ Report Generated Successfully!")
-        st.subheader(f"📈 KPI Report - {period_name}")
+        st.subheader(f"📈 KPI Report - {period_label}")
         st.caption(f"Showing {value_type}")
         
-        # Add custom CSS for modern styling
-        st.markdown("""
-        <style>
-        .kpi-card {
-            background: linear-gradient(135deg, #00D4AA 0%, #4AE54A 100%);
-            color: white;
-            padding: 1rem;
-            border-radius: 10px;
-            margin: 0.5rem 0;
-            box-shadow: 0 4px 6px rgba(0, 212, 170, 0.2);
-        }
-        .kpi-name {
-            font-size: 0.9rem;
-            font-weight: 500;
-            margin-bottom: 0.3rem;
-        }
-        .kpi-value {
-            font-size: 1.5rem;
-            font-weight: bold;
-        }
-        .dept-header {
-            background: linear-gradient(90deg, #00D4AA 0%, #2DD4BF 100%);
-            color: white;
-            padding: 1rem;
-            border-radius: 8px;
-            margin: 1rem 0 0.5rem 0;
-            font-size: 1.2rem;
-            font-weight: bold;
-            text-align: center;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
-        # Group by department and display
-        departments = filtered_data['department'].unique()
+        # Only one page of departments is rendered per run
+        departments = select_department_page(department_kpi_counts(filtered_data), "report")
         
-        for dept in sorted(departments):
-            dept_data = filtered_data[filtered_data['department'] == dept]
-            
-            # Modern department header
-            st.markdown(f'<div class="dept-header">🏢 {dept} Department</div>', unsafe_allow_html=True)
-            
-            # Display KPIs in a grid layout
-            kpi_list = dept_data.to_dict('records')
-            
-            # Create columns for KPI cards (2 per row)
-            for i in range(0, len(kpi_list), 2):
-                cols = st.columns(2)
+        with diagnostics.span("render_cards", f"{len(departments)} departments"):
+            for dept in departments:
+                dept_data = filtered_data[filtered_data['department'] == dept]
                 
-                for j, col in enumerate(cols):
-                    if i + j < len(kpi_list):
-                        kpi = kpi_list[i + j]
-                        with col:
-                            st.markdown(f"""
-                            <div class="kpi-card">
-                                <div class="kpi-name">📊 {kpi['kpi_name']}</div>
-                                <div class="kpi-value">{kpi['value']:.2f}</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-            
-            st.markdown("<br>", unsafe_allow_html=True)
+                # Modern department header
+                st.markdown(f'<div class="dept-header">🏢 {dept} Department</div>', unsafe_allow_html=True)
+                
+                # Display all KPI cards of the department as one grid block (2 per row)
+                st.markdown(kpi_grid_html(dept_data) + "<br>", unsafe_allow_html=True)
         
-        # Add download section
+        # Add download section (artifacts are built only when requested)
         st.markdown("---")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Generate PDF
-            pdf_buffer = create_pdf_report(filtered_data, period_name, value_type)
-            st.download_button(
-                label="📄 Download PDF Report",
-                data=pdf_buffer,
-                file_name=f"KPI_Report_{period_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                mime="application/pdf",
-                type="secondary"
-            )
-        
-        with col2:
-            # Generate CSV
-            csv_data = filtered_data.to_csv(index=False)
-            st.download_button(
-                label="📊 Download CSV Data",
-                data=csv_data,
-                file_name=f"KPI_Data_{period_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv",
-                type="secondary"
-            )
+        export_key = (dataset.fingerprint, "report", period_type, selected_year, selected_period, kpi_filter)
+        render_downloads([
+            {
+                'key': export_key + ("pdf",),
+                'kind': "PDF",
+                'prepare_label': "📄 Prepare PDF",
+                'label': "📄 Download PDF Report",
+                'builder': build_pdf_report,
+                'args': (filtered_data, period_label, value_type),
+                'file_name': f"KPI_Report_{period_label.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                'mime': "application/pdf",
+            },
+            {
+                'key': export_key + ("csv",),
+                'kind': "CSV",
+                'prepare_label': "📊 Prepare CSV",
+                'label': "📊 Download CSV Data",
+                'builder': lambda data: data.to_csv(index=False),
+                'args': (filtered_data,),
+                'file_name': f"KPI_Data_{period_label.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                'mime': "text/csv",
+            },
+        ])
+
+def get_result_memo():
+    """This session's memo of computed report/comparison/trend results"""
+    if 'result_memo' not in st.session_state:
+        st.session_state['result_memo'] = ResultMemo()
+    return st.session_state['result_memo']
+
+@st.cache_resource
+def get_export_cache():
+    """Process-wide cache of built PDF/CSV exports, keyed by data fingerprint and selection"""
+    return ExportCache()
+
+@st.cache_resource
+def get_ingestion_cache():
+    """Process-wide cache of parsed workbooks, shared by all sessions"""
+    budget_mb = os.environ.get("KPI_CACHE_BUDGET_MB")
+    budget = int(budget_mb) * 1024 * 1024 if budget_mb else DEFAULT_CACHE_BUDGET_BYTES
+    return IngestionCache(budget_bytes=budget)
+
+@st.cache_resource
+def get_kpi_store():
+    """SQLite store of loaded datasets, or None unless KPI_SQLITE_PATH is set"""
+    return KPIStore(SQLITE_PATH) if SQLITE_PATH else None
 
 # Main app
 st.set_page_config(page_title="KPI Dashboard", layout="wide")
@@ -843,6 +661,7 @@ st.markdown("""
         border-color: #00D4AA;
         background: #f0fffe;
     }
+""" + REPORT_CSS + """
 </style>
 """, unsafe_allow_html=True)
 
@@ -853,14 +672,33 @@ st.markdown('<p class="subtitle">Upload your data and generate beautiful reports
 # File upload in sidebar
 with st.sidebar:
     st.markdown("### 📁 Upload Data")
-    uploaded_file = st.file_uploader(
-        "Choose Excel file",
+    uploaded_files = st.file_uploader(
+        "Choose Excel files",
+        type=['xlsx', 'xls'],
+        accept_multiple_files=True,
+        help="Each sheet should contain: kpi_id, kpi_name, department, month, quarter, year, value, data_type. "
+             "All sheets of all files are combined; repeated (kpi_id, year, month) rows keep the later file's value."
+    )
+    delta_files = st.file_uploader(
+        "Append new months",
         type=['xlsx', 'xls'],
-        help="File should contain: kpi_id, kpi_name, department, month, quarter, year, value, data_type"
+        accept_multiple_files=True,
+        key="delta_files",
+        help="Workbooks with new months for the data above, in the same columns. Only the affected periods are "
+             "recomputed; repeated (kpi_id, year, month) rows replace the loaded value."
     )
+    show_diagnostics = st.toggle(
+        "Diagnostics",
+        help="Time each stage of this run (loading, period lookups, rendering, exports). "
+             "Set KPI_DIAGNOSTICS_LOG to also append the timings to a JSON-lines file."
+    )
+    diagnostics_panel = st.empty()
+
+# Timing spans of this run; a no-op unless the diagnostics panel is on
+diagnostics = StageTimer(enabled=show_diagnostics)
 
 # Main content
-if uploaded_file is None:
+if not uploaded_files:
     st.info("Please upload an Excel file to get started")
     st.markdown("""
     **Required Excel columns:**
@@ -875,23 +713,142 @@ if uploaded_file is None:
     """)
 else:
     try:
-        # Load and validate data
-        df = pd.read_excel(uploaded_file)
-        required_cols = ['kpi_id', 'kpi_name', 'department', 'month', 'quarter', 'year', 'value', 'data_type']
-        
-        if not all(col in df.columns for col in required_cols):
-            st.error(f"Missing required columns. Found: {list(df.columns)}")
-        else:
-            st.success(f"Data loaded successfully! {len(df)} records found")
-            
-            # Navigation tabs
-            tab1, tab2 = st.tabs(["📊 Reports", "📈 Comparison"])
-            
-            with tab1:
-                report_function(df)
-            
-            with tab2:
-                comparison_function(df)
+        # Load and validate data (parsed once per distinct set of files, then served from cache)
+        ingestion_cache = get_ingestion_cache()
+        kpi_store = get_kpi_store()
+        files = [(f.name, f.getvalue()) for f in uploaded_files]
+        new_files = [(f.name, f.getvalue()) for f in delta_files or []]
+        hits_before = ingestion_cache.hits
+        with diagnostics.span("ingest") as span:
+            # A stored dataset is queried period by period instead of being loaded into memory
+            dataset = kpi_store.open(fingerprint_files(files + new_files)) if kpi_store is not None else None
+            if dataset is not None:
+                data_key = dataset.fingerprint
+                cache_hit = True
+                span.note("sqlite store")
+            else:
+                if new_files:
+                    # Only the delta is parsed; the loaded data comes from the cache
+                    data_key, dataset = ingestion_cache.append(files, new_files)
+                else:
+                    data_key, dataset = ingestion_cache.load(files)
+                span.frame(dataset.df)
+                cache_hit = ingestion_cache.hits > hits_before
+                span.note("cache hit" if cache_hit else "parsed")
+        if kpi_store is not None and dataset.df is not None:
+            with diagnostics.span("sqlite_save", f"{len(dataset)} rows"):
+                kpi_store.save(dataset)
+        if diagnostics.enabled and not cache_hit:
+            # read_excel and column validation run in the ingestion workers, which time each file
+            for file_report in dataset.load_report.get('files', []):
+                diagnostics.add("read_excel", file_report['seconds'], rows=file_report['rows'],
+                                detail=file_report['file'])
+            validation = dataset.load_report.get('validation')
+            if validation:
+                diagnostics.add("validation", validation['seconds'], rows=validation['rows'],
+                                detail=f"{error_count(validation)} problems")
+        
+        st.success(f"Data loaded successfully! {len(dataset)} records found")
+        validation = dataset.load_report.get('validation')
+        if validation and error_count(validation):
+            st.warning(
+                f"{error_count(validation)} problems found in the data. Affected rows may be reported in the "
+                "wrong period or aggregated the wrong way; see the validation report below."
+            )
+            if validation.get('rows_left_out'):
+                st.caption(f"{validation['rows_left_out']} rows without a year, month and quarter were left out; "
+                           "values that are not numbers count as empty")
+            with st.expander("🔎 Validation report"):
+                st.dataframe(
+                    pd.DataFrame([{'check': CHECK_LABELS[check], 'rows': count}
+                                  for check, count in validation['counts'].items() if count]),
+                    use_container_width=True, hide_index=True
+                )
+                st.dataframe(pd.DataFrame(validation['errors']).drop(columns=['check']),
+                             use_container_width=True, hide_index=True)
+                if len(validation['errors']) < error_count(validation):
+                    st.caption(f"Showing the first {MAX_REPORTED_ROWS} rows of each check")
+        # Results of previously loaded data would keep that data in memory
+        get_result_memo().retain(data_key)
+        
+        with st.sidebar:
+            cache_stats = ingestion_cache.stats()
+            st.caption(
+                f"Ingestion cache: {cache_stats['loads']} loads · {cache_stats['hits']} hits · "
+                f"{cache_stats['misses']} misses · {cache_stats['bytes'] / 1024 / 1024:.1f} MB "
+                f"of {cache_stats['budget_bytes'] / 1024 / 1024:.0f} MB"
+            )
+            if dataset.df is None:
+                st.caption(f"Served from the SQLite store {SQLITE_PATH}: each period is queried on demand")
+            memory_report = dataset.memory_report
+            if memory_report and dataset.df is not None:
+                st.caption(
+                    f"Table memory: {memory_report['bytes_before'] / 1024:.0f} KB as read, "
+                    f"{memory_report['bytes_after'] / 1024:.0f} KB compacted"
+                )
+            load_report = dataset.load_report
+            if load_report:
+                with st.expander("⏱️ Parse timings"):
+                    st.dataframe(pd.DataFrame(load_report['files']), use_container_width=True, hide_index=True)
+                    st.caption(
+                        f"Total {load_report['wall_seconds']:.2f}s wall time · "
+                        f"{load_report['duplicates_dropped']} duplicate rows dropped"
+                    )
+                appended = load_report.get('appended')
+                if appended:
+                    st.caption(
+                        f"Appended {appended['rows']} rows · "
+                        f"{appended['rollups_updated']} quarter/half/year rollups recomputed"
+                    )
+        
+        # Department / KPI filter shared by both tabs
+        kpi_filter = select_kpi_filter(dataset)
+        
+        # Navigation tabs
+        tab1, tab2 = st.tabs(["📊 Reports", "📈 Comparison"])
+        
+        with tab1:
+            report_function(dataset, kpi_filter)
+        
+        with tab2:
+            comparison_function(dataset, kpi_filter)
             
+    except (MissingColumnsError, SchemaMismatchError) as e:
+        st.error(str(e))
     except Exception as e:
-        st.error(f"Error reading file: {str(e)}")
\ No newline at end of file
+        st.error(f"Error reading file: {str(e)}")
+
+# Diagnostics panel, filled in last so it covers every stage of the run
+if diagnostics.enabled:
+    with diagnostics_panel.container():
+        st.markdown("### 🩺 Diagnostics")
+        if diagnostics.spans:
+            spans = pd.DataFrame(diagnostics.spans)
+            spans['ms'] = spans['seconds'] * 1000
+            spans['KB'] = spans['bytes'] / 1024
+            st.dataframe(spans[['stage', 'ms', 'rows', 'KB', 'detail']], use_container_width=True, hide_index=True,
+                         column_config={'ms': st.column_config.NumberColumn(format="%.1f"),
+                                        'KB': st.column_config.NumberColumn(format="%.0f")})
+        st.caption(f"Run {diagnostics.run_id} · {len(diagnostics.spans)} stages · "
+                   f"{diagnostics.total_seconds() * 1000:.0f} ms summed over stages")
+        export_builds = st.session_state.pop('export_builds', [])
+        if export_builds:
+            builds = pd.DataFrame(export_builds)
+            builds['ms'] = builds['seconds'] * 1000
+            builds['KB'] = builds['bytes'] / 1024
+            st.markdown("**Exports built since the previous run**")
+            st.dataframe(builds[['stage', 'ms', 'KB', 'detail']], use_container_width=True, hide_index=True,
+                         column_config={'ms': st.column_config.NumberColumn(format="%.1f"),
+                                        'KB': st.column_config.NumberColumn(format="%.0f")})
+        memo_stats = get_result_memo().stats()
+        st.caption(
+            f"Result memo: {memo_stats['hits']} hits · {memo_stats['misses']} misses "
+            f"({memo_stats['hit_rate']:.0%} hit rate) · {memo_stats['entries']}/{memo_stats['max_entries']} entries"
+        )
+        export_stats = get_export_cache().stats()
+        st.caption(
+            f"Export cache: {export_stats['builds']} builds · {export_stats['hits']} reused · "
+            f"{export_stats['entries']}/{export_stats['max_entries']} entries"
+        )
+        if diagnostics.log_path:
+            st.caption(f"Appending to {diagnostics.log_path}")
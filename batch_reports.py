@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Render every KPI report and period-over-period comparison without the UI.
+
+    python batch_reports.py sample_kpi_data.xlsx -o reports/
+
+For each workbook set this writes, as PDF and CSV:
+  - a report for every month, quarter, half and year in the data
+  - a comparison of every period with the previous period of the same type
+
+Rendering is spread over a process pool. A manifest in the output directory
+records a hash of each artifact's inputs, so re-running on unchanged data
+only renders what changed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.comparison import COMPARISON_CSV_COLUMNS, compare_periods
+from utils.dataset import KPIDataset
+from utils.ingest import fingerprint_files, load_workbooks
+from utils.pdf_reports import create_comparison_pdf, create_pdf_report
+from utils.rollups import PERIOD_TYPES, period_name, value_type_label
+from utils.validation import CHECK_LABELS, error_count
+
+MANIFEST_FILE = ".kpi_batch_manifest.json"
+
+# Bump to force every artifact to be re-rendered after a layout change
+BATCH_FORMAT_VERSION = 1
+
+
+def _period_sort_key(key):
+    _, year, period = key
+    return (year, period or 0)
+
+
+def periods_by_type(dataset):
+    """Cube keys grouped by period type, in chronological order"""
+    periods = {period_type: [] for period_type in PERIOD_TYPES}
+    for key in dataset.cube:
+        periods[key[0]].append(key)
+    return {period_type: sorted(keys, key=_period_sort_key) for period_type, keys in periods.items()}
+
+
+def _input_hash(kind, labels, data):
+    digest = hashlib.sha256(f"{BATCH_FORMAT_VERSION}|{kind}|{'|'.join(labels)}".encode())
+    digest.update(data.to_csv(index=False).encode())
+    return digest.hexdigest()
+
+
+def _slug(label):
+    return label.replace(' ', '_')
+
+
+def plan_jobs(dataset, include_comparisons=True):
+    """Every artifact to render, as job dicts with a relative output path and input hash"""
+    jobs = []
+    for period_type, keys in periods_by_type(dataset).items():
+        for key in keys:
+            data = dataset.cube[key]
+            if data.empty:
+                continue
+            label = period_name(*key)
+            value_type = value_type_label(period_type)
+            folder = os.path.join("reports", period_type)
+            jobs.append({'kind': "report_pdf", 'data': data, 'labels': (label, value_type),
+                         'path': os.path.join(folder, f"KPI_Report_{_slug(label)}.pdf")})
+            jobs.append({'kind': "report_csv", 'data': data, 'labels': (label,),
+                         'path': os.path.join(folder, f"KPI_Data_{_slug(label)}.csv")})
+
+        if not include_comparisons:
+            continue
+        for previous, current in zip(keys, keys[1:]):
+            comparison_data = compare_periods(dataset.cube[previous], dataset.cube[current])
+            if comparison_data.empty:
+                continue
+            label_1, label_2 = period_name(*previous), period_name(*current)
+            folder = os.path.join("comparisons", period_type)
+            stem = f"KPI_Comparison_{_slug(label_1)}_vs_{_slug(label_2)}"
+            jobs.append({'kind': "comparison_pdf", 'data': comparison_data, 'labels': (label_1, label_2),
+                         'path': os.path.join(folder, f"{stem}.pdf")})
+            jobs.append({'kind': "comparison_csv", 'data': comparison_data[COMPARISON_CSV_COLUMNS],
+                         'labels': (label_1, label_2), 'path': os.path.join(folder, f"{stem}.csv")})
+
+    for job in jobs:
+        job['hash'] = _input_hash(job['kind'], job['labels'], job['data'])
+    return jobs
+
+
+def render_job(job, output_dir):
+    """Render one artifact to disk. Runs in a worker process."""
+    start = time.perf_counter()
+    path = os.path.join(output_dir, job['path'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    kind, data, labels = job['kind'], job['data'], job['labels']
+    if kind.endswith("_csv"):
+        data.to_csv(path, index=False)
+    else:
+        if kind == "report_pdf":
+            pdf = create_pdf_report(data, *labels)
+        else:
+            pdf = create_comparison_pdf(data, *labels)
+        with pdf, open(path, "wb") as f:
+            shutil.copyfileobj(pdf, f)
+    return job['path'], time.perf_counter() - start
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def run_batch(workbooks, output_dir, workers=None, include_comparisons=True, force=False):
+    """Render all artifacts for the given workbook paths; returns a summary dict"""
+    start = time.perf_counter()
+    files = []
+    for path in workbooks:
+        with open(path, "rb") as f:
+            files.append((os.path.basename(path), f.read()))
+    df, memory_report, load_report = load_workbooks(files)
+    dataset = KPIDataset(df, fingerprint_files(files), memory_report, load_report)
+    load_seconds = time.perf_counter() - start
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(output_dir)
+    jobs = plan_jobs(dataset, include_comparisons)
+    todo = [job for job in jobs
+            if manifest.get(job['path']) != job['hash'] or not os.path.exists(os.path.join(output_dir, job['path']))]
+
+    render_start = time.perf_counter()
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(job, pool.submit(render_job, job, output_dir)) for job in todo]
+            for job, future in futures:
+                future.result()
+                manifest[job['path']] = job['hash']
+        save_manifest(output_dir, manifest)
+    render_seconds = time.perf_counter() - render_start
+
+    return {
+        'rows': len(dataset.df),
+        'load_seconds': load_seconds,
+        'validation': load_report['validation'],
+        'artifacts': len(jobs),
+        'rendered': len(todo),
+        'reports_rendered': sum(1 for job in todo if job['kind'].endswith("_pdf")),
+        'skipped': len(jobs) - len(todo),
+        'render_seconds': render_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("workbooks", nargs="+", help="Excel workbook(s) with KPI data")
+    parser.add_argument("-o", "--output-dir", required=True, help="directory to write reports into")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--no-comparisons", action="store_true", help="only render period reports")
+    parser.add_argument("--force", action="store_true", help="re-render artifacts even if their inputs are unchanged")
+    args = parser.parse_args()
+
+    summary = run_batch(args.workbooks, args.output_dir, args.workers, not args.no_comparisons, args.force)
+
+    print(f"Loaded {summary['rows']} rows in {summary['load_seconds']:.2f}s")
+    validation = summary['validation']
+    if error_count(validation):
+        print(f"WARNING: {error_count(validation)} problems found in the data:")
+        for check, count in validation['counts'].items():
+            if count:
+                print(f"  {CHECK_LABELS[check]}: {count} rows")
+        for error in validation['errors'][:10]:
+            print(f"  {error['file']} / {error['sheet']} row {error['row']}: {error['problem']} ({error['value']})")
+        if validation.get('rows_left_out'):
+            print(f"  {validation['rows_left_out']} rows without a year, month and quarter were left out")
+    print(f"{summary['artifacts']} artifacts: {summary['rendered']} rendered, {summary['skipped']} unchanged")
+    if summary['rendered']:
+        seconds = summary['render_seconds']
+        print(f"Rendered in {seconds:.2f}s: {summary['reports_rendered'] / seconds:.1f} reports/sec "
+              f"({summary['rendered'] / seconds:.1f} files/sec including CSVs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Benchmarks for the KPI dashboard. Run from the repository root with `python -m benchmarks.<name>`."""
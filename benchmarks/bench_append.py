@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Check that appending a month gives the same reports as a full reload, and
+compare their speed.
+
+    python -m benchmarks.bench_append [--copies 50]
+
+The sample is widened to `copies` times as many KPIs and split into a history
+workbook (everything but the last month) and a delta workbook (the last
+month, plus corrected values for a few rows of the month before). Every
+report and comparison is then produced from both the appended dataset and a
+fresh load of both workbooks and compared byte for byte: the CSV of every
+period and the PDF of every period the delta touched. The timing compares
+IngestionCache.append with loading both workbooks from scratch.
+"""
+import argparse
+import io
+import time
+
+import pandas as pd
+from reportlab import rl_config
+
+from benchmarks.bench_aggregation import SAMPLE_FILE, widen
+from utils.comparison import compare_periods
+from utils.ingest import IngestionCache
+from utils.pdf_reports import create_comparison_pdf, create_pdf_report
+from utils.rollups import period_name, value_type_label
+
+
+def to_workbook(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def split_last_month(df, corrections=5):
+    """History without the last month, and a delta with that month plus a few corrected earlier rows"""
+    last_year = df['year'].max()
+    last_month = df.loc[df['year'] == last_year, 'month'].max()
+    in_last_month = (df['year'] == last_year) & (df['month'] == last_month)
+    history, delta = df[~in_last_month], df[in_last_month]
+    corrected = history[(history['year'] == last_year) & (history['month'] == last_month - 1)].head(corrections)
+    delta = pd.concat([delta, corrected.assign(value=corrected['value'] * 1.1)], ignore_index=True)
+    return history, delta
+
+
+def check_matches_reload(appended, reloaded):
+    """Assert that both datasets produce identical reports; return the number of outputs compared"""
+    assert sorted(appended.cube, key=repr) == sorted(reloaded.cube, key=repr), "different periods"
+    compared = 0
+    for key in reloaded.cube:
+        expected, actual = reloaded.cube[key].to_csv(index=False), appended.cube[key].to_csv(index=False)
+        assert actual == expected, f"CSV of {key} differs"
+        compared += 1
+
+    # PDFs embed a timestamp and document ids; invariant mode keeps the ids fixed
+    rl_config.invariant = 1
+    for key in appended.updated_rollups:
+        period_type, year, period = key
+        label = period_name(period_type, year, period)
+        expected = create_pdf_report(reloaded.cube[key], label, value_type_label(period_type)).read()
+        actual = create_pdf_report(appended.cube[key], label, value_type_label(period_type)).read()
+        assert actual == expected, f"PDF of {label} differs"
+        compared += 1
+
+    years = sorted(year for period_type, year, _ in reloaded.cube if period_type == "annually")
+    if len(years) > 1:
+        first, last = ("annually", years[-2], None), ("annually", years[-1], None)
+        expected = create_comparison_pdf(compare_periods(reloaded.cube[first], reloaded.cube[last]), "A", "B").read()
+        actual = create_comparison_pdf(compare_periods(appended.cube[first], appended.cube[last]), "A", "B").read()
+        assert actual == expected, "comparison PDF differs"
+        compared += 1
+    return compared
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--copies", type=int, default=50, help="how many times to repeat the sample KPIs")
+    args = parser.parse_args()
+
+    history, delta = split_last_month(widen(pd.read_excel(SAMPLE_FILE), args.copies))
+    files = [("history.xlsx", to_workbook(history))]
+    delta_files = [("delta.xlsx", to_workbook(delta))]
+
+    cache = IngestionCache(max_workers=1, sidecar_dir=None)
+    cache.load(files)
+    start = time.perf_counter()
+    append_key, appended = cache.append(files, delta_files)
+    append_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reload_key, reloaded = IngestionCache(max_workers=1, sidecar_dir=None).load(files + delta_files)
+    reload_time = time.perf_counter() - start
+
+    assert append_key == reload_key, "cache keys differ"
+    compared = check_matches_reload(appended, reloaded)
+    print(f"OK: {compared} outputs identical after appending {len(delta)} rows to {len(history)} "
+          f"({len(appended.updated_rollups)} of {len(appended.cube)} periods recomputed)")
+    print(f"  full reload: {reload_time * 1000:8.1f} ms")
+    print(f"  append:      {append_time * 1000:8.1f} ms  ({reload_time / append_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
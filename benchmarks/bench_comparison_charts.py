@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Compare the cost of the comparison chart layouts for one large department.
+
+    python -m benchmarks.bench_comparison_charts [--kpis 60]
+
+For each layout this builds the department's figures and serialises them to
+JSON, which is what st.plotly_chart sends to the browser, and reports the
+number of figures, payload size and time taken.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.charts import CHART_MODES, CHART_MODE_LABELS, department_comparison_figures
+from utils.comparison import change_percent
+
+
+def synthetic_department(kpis, seed=0):
+    rng = np.random.default_rng(seed)
+    period_1 = rng.normal(1000, 250, kpis)
+    period_2 = period_1 * rng.normal(1, 0.1, kpis)
+    data = pd.DataFrame({
+        'department': "Sales",
+        'kpi_name': [f"KPI {i:03d}" for i in range(kpis)],
+        'period_1_value': period_1,
+        'period_2_value': period_2,
+    })
+    data['change_percent'] = change_percent(data['period_1_value'], data['period_2_value'])
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--kpis", type=int, default=60)
+    args = parser.parse_args()
+
+    dept_data = synthetic_department(args.kpis)
+    # Warm up plotly's lazy imports so the first layout is not penalised
+    department_comparison_figures(dept_data.head(2), "Q1 2023", "Q1 2024", "per_kpi")[0][0].to_json()
+
+    print(f"Department with {args.kpis} KPIs:")
+    print(f"  {'layout':<20}{'figures':>8}{'payload KB':>12}{'build+serialise ms':>20}")
+    for mode in CHART_MODES:
+        start = time.perf_counter()
+        # No cap, so every layout draws all KPIs
+        figures, _ = department_comparison_figures(dept_data, "Q1 2023", "Q1 2024", mode, max_kpis=args.kpis)
+        payload = sum(len(fig.to_json()) for fig in figures)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"  {CHART_MODE_LABELS[mode]:<20}{len(figures):>8}{payload / 1024:>12.0f}{elapsed:>20.0f}")
+
+    start = time.perf_counter()
+    figures, _ = department_comparison_figures(dept_data, "Q1 2023", "Q1 2024", "grouped", max_kpis=args.kpis - 1)
+    payload = sum(len(fig.to_json()) for fig in figures)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"  {'Change summary (cap)':<20}{len(figures):>8}{payload / 1024:>12.0f}{elapsed:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
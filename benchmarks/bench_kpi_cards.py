@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Compare per-card and batched rendering of the report view's KPI cards.
+
+    python -m benchmarks.bench_kpi_cards [--kpis 1000] [--departments 10] [--runs 5]
+
+Both layouts are rendered by Streamlit's AppTest harness, which executes the
+script the same way a browser rerun does. For each layout this reports the
+number of elements on the page and the mean rerun time.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+
+def synthetic_report(kpis, departments, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'department': [f"Dept {i % departments:02d}" for i in range(kpis)],
+        'kpi_name': [f"KPI {i:04d}" for i in range(kpis)],
+        'value': rng.normal(1000, 250, kpis),
+    })
+
+
+def per_card_script(data):
+    """The original layout: one st.columns row per pair and one element per card"""
+    import streamlit as st
+
+    from utils.cards import REPORT_CSS
+
+    st.markdown(f"<style>{REPORT_CSS}</style>", unsafe_allow_html=True)
+    for dept in data['department'].unique():
+        dept_data = data[data['department'] == dept]
+        st.markdown(f'<div class="dept-header">🏢 {dept} Department</div>', unsafe_allow_html=True)
+        kpi_list = dept_data.to_dict('records')
+        for i in range(0, len(kpi_list), 2):
+            cols = st.columns(2)
+            for j, col in enumerate(cols):
+                if i + j < len(kpi_list):
+                    kpi = kpi_list[i + j]
+                    with col:
+                        st.markdown(f"""
+                        <div class="kpi-card">
+                            <div class="kpi-name">📊 {kpi['kpi_name']}</div>
+                            <div class="kpi-value">{kpi['value']:.2f}</div>
+                        </div>
+                        """, unsafe_allow_html=True)
+        st.markdown("<br>", unsafe_allow_html=True)
+
+
+def batched_script(data):
+    """One grid block per department"""
+    import streamlit as st
+
+    from utils.cards import REPORT_CSS, kpi_grid_html
+
+    st.markdown(f"<style>{REPORT_CSS}</style>", unsafe_allow_html=True)
+    for dept in data['department'].unique():
+        dept_data = data[data['department'] == dept]
+        st.markdown(f'<div class="dept-header">🏢 {dept} Department</div>', unsafe_allow_html=True)
+        st.markdown(kpi_grid_html(dept_data) + "<br>", unsafe_allow_html=True)
+
+
+def count_elements(node):
+    children = getattr(node, "children", None)
+    if not children:
+        return 1
+    return 1 + sum(count_elements(child) for child in children.values())
+
+
+def measure(script, data, runs):
+    # AppTest runs the function's source on its own, so it imports what it needs
+    app = AppTest.from_function(script, args=(data,), default_timeout=120)
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    elements = count_elements(app._tree) - 1
+    start = time.perf_counter()
+    for _ in range(runs):
+        app.run()
+    return elements, (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--kpis", type=int, default=1000)
+    parser.add_argument("--departments", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    data = synthetic_report(args.kpis, args.departments)
+    print(f"Report with {args.kpis} KPIs in {args.departments} departments:")
+    print(f"  {'layout':<12}{'elements':>10}{'rerun ms':>12}")
+    for label, script in (("per-card", per_card_script), ("batched", batched_script)):
+        elements, elapsed = measure(script, data, args.runs)
+        print(f"  {label:<12}{elements:>10}{elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
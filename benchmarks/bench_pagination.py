@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Rerun time of the report and comparison views with every department rendered
+versus one page of departments.
+
+    python -m benchmarks.bench_pagination [--departments 10 40 160] [--kpis-per-department 50] [--runs 3]
+
+Each view is rendered by Streamlit's AppTest harness for synthetic data with
+a growing number of departments, once with all departments on the page (the
+previous behaviour) and once with the first page from utils.pagination.
+With paging, the element count and rerun time should stay flat as the
+number of departments grows.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.bench_kpi_cards import count_elements
+from utils.pagination import department_kpi_counts, department_pages
+
+
+def synthetic_comparison(departments, kpis_per_department, seed=0):
+    rng = np.random.default_rng(seed)
+    kpis = departments * kpis_per_department
+    period_1 = rng.normal(1000, 250, kpis)
+    period_2 = period_1 * rng.normal(1.02, 0.1, kpis)
+    return pd.DataFrame({
+        'department': [f"Dept {i // kpis_per_department:03d}" for i in range(kpis)],
+        'kpi_name': [f"KPI {i:05d}" for i in range(kpis)],
+        'value': period_2,
+        'period_1_value': period_1,
+        'period_2_value': period_2,
+        'change_percent': (period_2 - period_1) / period_1 * 100,
+        'data_type': "number",
+    })
+
+
+def report_script(data, paged):
+    import streamlit as st
+
+    from utils.cards import REPORT_CSS, kpi_grid_html
+    from utils.pagination import department_kpi_counts, department_pages
+
+    st.markdown(f"<style>{REPORT_CSS}</style>", unsafe_allow_html=True)
+    departments = [dept for dept, _ in department_kpi_counts(data)]
+    if paged:
+        departments = department_pages(department_kpi_counts(data))[0]
+    for dept in departments:
+        dept_data = data[data['department'] == dept]
+        st.markdown(f'<div class="dept-header">🏢 {dept} Department</div>', unsafe_allow_html=True)
+        st.markdown(kpi_grid_html(dept_data) + "<br>", unsafe_allow_html=True)
+
+
+def comparison_script(data, paged):
+    import streamlit as st
+
+    from utils.charts import department_comparison_figures
+    from utils.pagination import department_kpi_counts, department_pages
+
+    departments = [dept for dept, _ in department_kpi_counts(data)]
+    if paged:
+        departments = department_pages(department_kpi_counts(data))[0]
+    for dept in departments:
+        dept_data = data[data['department'] == dept]
+        st.markdown(f'<div class="dept-header">🏢 {dept} Department</div>', unsafe_allow_html=True)
+        figures, _ = department_comparison_figures(dept_data, "Period 1", "Period 2", "grouped")
+        for fig in figures:
+            st.plotly_chart(fig)
+        st.dataframe(dept_data[['kpi_name', 'period_1_value', 'period_2_value', 'change_percent']], hide_index=True)
+
+
+def measure(script, data, paged, runs):
+    """(elements on the page, mean rerun ms) of a view script"""
+    app = AppTest.from_function(script, args=(data, paged), default_timeout=300)
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    elements = count_elements(app._tree) - 1
+    start = time.perf_counter()
+    for _ in range(runs):
+        app.run()
+    return elements, (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--departments", type=int, nargs="+", default=[10, 40, 160])
+    parser.add_argument("--kpis-per-department", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{args.kpis_per_department} KPIs per department")
+    print(f"  {'view':<12}{'departments':>12}{'pages':>7}{'all: elements':>15}{'ms':>8}{'paged: elements':>17}{'ms':>8}")
+    for departments in args.departments:
+        data = synthetic_comparison(departments, args.kpis_per_department)
+        pages = len(department_pages(department_kpi_counts(data)))
+        for label, script in (("report", report_script), ("comparison", comparison_script)):
+            all_elements, all_ms = measure(script, data, False, args.runs)
+            paged_elements, paged_ms = measure(script, data, True, args.runs)
+            print(f"  {label:<12}{departments:>12}{pages:>7}{all_elements:>15}{all_ms:>8.0f}"
+                  f"{paged_elements:>17}{paged_ms:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
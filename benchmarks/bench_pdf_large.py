@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Time and peak memory of the PDF generators on large reports.
+
+    python -m benchmarks.bench_pdf_large [--sizes 10000 100000] [--departments 5]
+
+Each (size, mode) combination runs in a fresh subprocess so its peak RSS is
+measured in isolation. "standard" is the original layout (one KeepTogether
+block per department, rows built with iterrows) and "large" is the
+large-report mode. The standard layout is skipped above --standard-max rows
+because it takes minutes there.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_report(rows, departments, seed=0):
+    """A report frame shaped like a quarterly rollup with `rows` KPIs"""
+    rng = np.random.default_rng(seed)
+    dept = np.arange(rows) % departments
+    return pd.DataFrame({
+        'department': pd.Categorical([f"Department {d:02d}" for d in dept]),
+        'kpi_name': pd.Categorical([f"KPI {i:06d}" for i in range(rows)]),
+        'value': rng.normal(1000, 250, rows),
+        'data_type': pd.Categorical(np.where(rng.random(rows) < 0.4, "percentage", "number")),
+    })
+
+
+def synthetic_comparison(rows, departments, seed=0):
+    report = synthetic_report(rows, departments, seed)
+    comparison = report.rename(columns={'value': 'period_1_value'})
+    comparison['period_2_value'] = comparison['period_1_value'] * np.random.default_rng(seed + 1).normal(1, 0.1, rows)
+    comparison['change_percent'] = ((comparison['period_2_value'] - comparison['period_1_value']) /
+                                    comparison['period_1_value'].abs()) * 100
+    return comparison
+
+
+def run_worker(kind, rows, departments, mode):
+    """Build one PDF in this process and print its timing as JSON"""
+    from utils.pdf_reports import create_comparison_pdf, create_pdf_report
+
+    large = mode == "large"
+    if kind == "report":
+        data = synthetic_report(rows, departments)
+        start = time.perf_counter()
+        output = create_pdf_report(data, "Q1 2024", "Calculated values", large=large)
+    else:
+        data = synthetic_comparison(rows, departments)
+        start = time.perf_counter()
+        output = create_comparison_pdf(data, "Q1 2023", "Q1 2024", large=large)
+    seconds = time.perf_counter() - start
+    size = len(output.read())
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'seconds': seconds, 'peak_rss_mb': peak_mb, 'pdf_bytes': size}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--departments", type=int, default=5)
+    parser.add_argument("--kinds", nargs="+", default=["report", "comparison"], choices=["report", "comparison"])
+    parser.add_argument("--standard-max", type=int, default=10_000,
+                        help="largest size to also run with the standard layout")
+    parser.add_argument("--worker", nargs=3, metavar=("KIND", "ROWS", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        kind, rows, mode = args.worker
+        run_worker(kind, int(rows), args.departments, mode)
+        return
+
+    print(f"{'kind':<11}{'rows':>9}  {'mode':<9}{'seconds':>9}{'peak RSS MB':>13}{'PDF MB':>9}")
+    for kind in args.kinds:
+        for rows in args.sizes:
+            modes = ["standard", "large"] if rows <= args.standard_max else ["large"]
+            for mode in modes:
+                result = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_pdf_large", "--departments", str(args.departments),
+                     "--worker", kind, str(rows), mode],
+                    capture_output=True, text=True, check=True,
+                )
+                stats = json.loads(result.stdout.strip().splitlines()[-1])
+                print(f"{kind:<11}{rows:>9}  {mode:<9}{stats['seconds']:>9.2f}{stats['peak_rss_mb']:>13.0f}"
+                      f"{stats['pdf_bytes'] / 1024 / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Measure the per-export style setup cost of the PDF generators.
+
+    python -m benchmarks.bench_pdf_setup [--departments 5] [--calls 500]
+
+"before" repeats what each create_pdf_report / create_comparison_pdf call used
+to do: getSampleStyleSheet(), three ParagraphStyles and one TableStyle per
+department. "after" is the shared theme from utils.pdf_theme, which is built
+once per process and then only looked up.
+"""
+import argparse
+import time
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import TableStyle
+
+from utils.pdf_theme import PDFTheme, get_theme
+
+
+def legacy_setup(departments):
+    """Style setup as previously done inside every generator call"""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=22, spaceAfter=20,
+                                 alignment=TA_CENTER, textColor=colors.HexColor('#00D4AA'), fontName='Helvetica-Bold')
+    subtitle_style = ParagraphStyle('CustomSubtitle', parent=styles['Heading2'], fontSize=14, spaceAfter=30,
+                                    alignment=TA_CENTER, textColor=colors.HexColor('#666666'))
+    dept_style = ParagraphStyle('DeptHeader', parent=styles['Heading2'], fontSize=16, spaceAfter=8, spaceBefore=15,
+                                textColor=colors.HexColor('#00D4AA'), fontName='Helvetica-Bold', alignment=TA_CENTER,
+                                backColor=colors.HexColor('#E6FFFA'), borderWidth=2,
+                                borderColor=colors.HexColor('#00D4AA'), borderPadding=10, borderRadius=5)
+    table_styles = []
+    for _ in range(departments):
+        table_styles.append(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#00D4AA')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#DDDDDD')),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8FAFC')]),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('LEFTPADDING', (0, 0), (-1, -1), 15),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+            ('TOPPADDING', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ]))
+    return title_style, subtitle_style, dept_style, table_styles
+
+
+def themed_setup(departments):
+    """Style setup with the shared theme"""
+    theme = get_theme()
+    return theme.title, theme.subtitle, theme.dept_header, [theme.report_table] * departments
+
+
+def per_call_us(func, departments, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(departments)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--departments", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    PDFTheme()
+    build_us = (time.perf_counter() - start) * 1e6
+    get_theme()
+
+    before = per_call_us(legacy_setup, args.departments, args.calls)
+    after = per_call_us(themed_setup, args.departments, args.calls)
+    print(f"Style setup per export ({args.departments} departments, {args.calls} calls):")
+    print(f"  before (rebuilt per call): {before:9.1f} us")
+    print(f"  after (shared theme):      {after:9.1f} us  ({before / after:.0f}x less)")
+    print(f"  one-time theme build:      {build_us:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Check the KPI name search index against a plain substring scan and time both.
+
+    python -m benchmarks.bench_search [--names 50000] [--departments 40] [--rows 1000000]
+
+Synthetic department/KPI names are indexed once, as at ingestion, and every
+query must return the same names as lowercasing and scanning every name. The
+filter timing compares applying a department/KPI selection to a period's rows
+before aggregating with aggregating everything and filtering the result.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.search import KPISearchIndex, filter_rows
+
+WORDS = ["Revenue", "Cost", "Customer", "Satisfaction", "Churn", "Ticket", "Resolution", "Time",
+         "Headcount", "Turnover", "Margin", "Lead", "Conversion", "Uptime", "Backlog", "Defect"]
+QUERIES = ["rev", "cust sat", "time 12", "ion", "Margin 4999", "xyz", "co", "t"]
+
+
+def synthetic_names(names, departments, seed=0):
+    rng = np.random.default_rng(seed)
+    words = rng.choice(WORDS, size=(names, 2))
+    kpi_names = [f"{first} {second} {i}" for i, (first, second) in enumerate(words)]
+    return [f"Dept {i % departments:03d}" for i in range(names)], kpi_names
+
+
+def timed(func, runs=1):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = func()
+    return result, (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--names", type=int, default=50_000)
+    parser.add_argument("--departments", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    departments, kpi_names = synthetic_names(args.names, args.departments)
+    kpi_index, build_seconds = timed(lambda: KPISearchIndex(departments, kpi_names))
+    print(f"{len(kpi_index.names)} KPI names in {len(kpi_index.departments)} departments · "
+          f"index built in {build_seconds * 1000:.0f} ms (once per load)")
+
+    print(f"  {'query':<14}{'matches':>9}{'index ms':>10}{'scan ms':>10}")
+    for query in QUERIES:
+        found, index_seconds = timed(lambda: kpi_index.kpi_options((), query), runs=5)
+        expected, scan_seconds = timed(
+            lambda: [name for name in kpi_index.names if query.strip().lower() in name.lower()], runs=5)
+        assert found == expected, query
+        print(f"  {query!r:<14}{len(found):>9}{index_seconds * 1000:>10.2f}{scan_seconds * 1000:>10.2f}")
+
+    selected = kpi_index.departments[:2]
+    found, _ = timed(lambda: kpi_index.kpi_options(selected, "rev"))
+    expected = sorted({name for dept, name in zip(departments, kpi_names) if dept in selected and "rev" in name.lower()})
+    assert found == expected, "department search"
+    print(f"OK: every query matches the scan ({len(found)} names for 'rev' in {len(selected)} departments)")
+
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, args.names, args.rows)
+    rows = pd.DataFrame({
+        'department': pd.Categorical(np.asarray(departments)[picks]),
+        'kpi_name': pd.Categorical(np.asarray(kpi_names)[picks]),
+        'value': rng.normal(100, 10, args.rows),
+    })
+    wanted = kpi_index.kpi_options(selected, "rev")
+    aggregate = lambda df: df.groupby(['department', 'kpi_name'], observed=True, sort=False)['value'].mean()
+    before, before_seconds = timed(lambda: aggregate(filter_rows(rows, selected, wanted)))
+    after, after_seconds = timed(lambda: aggregate(rows).loc[lambda s: s.index.get_level_values('kpi_name').isin(wanted)])
+    assert len(before) == len(after)
+    print(f"{args.rows} rows: filter then aggregate {before_seconds * 1000:.0f} ms · "
+          f"aggregate then filter {after_seconds * 1000:.0f} ms ({len(before)} KPIs kept)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Load time of the same workbook parsed from .xlsx versus read from its sidecar.
+
+    python -m benchmarks.bench_sidecar [--size 1m] [--repeat 3] [--json sidecar.json]
+
+The workbook comes from the benchmark suite (generated into .benchmark_data/
+on first use). It is loaded once with sidecars off, i.e. parsed from .xlsx
+as before, then its Arrow sidecar is written and the workbook is loaded
+again, now memory-mapped from the sidecar. Both tables must be identical.
+Each load is timed as the best of --repeat runs.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.suite import workbook_for
+from utils.ingest import load_workbooks
+from utils.synthetic import DATASET_SIZES
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", choices=list(DATASET_SIZES), default="1m")
+    parser.add_argument("--repeat", type=int, default=3, help="timed loads of each kind (the best is kept)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    path = workbook_for(args.size)
+    with open(path, 'rb') as f:
+        files = [(os.path.basename(path), f.read())]
+
+    sidecar_dir = tempfile.mkdtemp(prefix="kpi_sidecars_")
+    try:
+        (parsed, _, _), xlsx_seconds = best_of(args.repeat, lambda: load_workbooks(files, sidecar_dir=None))
+        start = time.perf_counter()
+        load_workbooks(files, sidecar_dir=sidecar_dir)
+        first_seconds = time.perf_counter() - start
+        sidecar_bytes = sum(os.path.getsize(os.path.join(sidecar_dir, name)) for name in os.listdir(sidecar_dir))
+        (loaded, _, load_report), sidecar_seconds = best_of(
+            args.repeat, lambda: load_workbooks(files, sidecar_dir=sidecar_dir))
+    finally:
+        shutil.rmtree(sidecar_dir)
+
+    assert load_report['files'][0]['sidecar'], "the sidecar was not used"
+    pd.testing.assert_frame_equal(parsed, loaded)
+    print(f"OK: {len(loaded)} rows identical from {os.path.basename(path)} "
+          f"({len(files[0][1]) / 1024 / 1024:.1f} MB) and its sidecar ({sidecar_bytes / 1024 / 1024:.1f} MB)")
+    print(f"  .xlsx parse:          {xlsx_seconds * 1000:10.1f} ms")
+    print(f"  parse + write sidecar:{first_seconds * 1000:10.1f} ms")
+    print(f"  sidecar (mmap) load:  {sidecar_seconds * 1000:10.1f} ms  ({xlsx_seconds / sidecar_seconds:.0f}x faster)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'size': args.size,
+                'rows': len(loaded),
+                'xlsx_bytes': len(files[0][1]),
+                'sidecar_bytes': sidecar_bytes,
+                'xlsx_ms': xlsx_seconds * 1000,
+                'first_load_ms': first_seconds * 1000,
+                'sidecar_ms': sidecar_seconds * 1000,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
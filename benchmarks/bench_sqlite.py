@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Check the SQLite store against the in-memory rollup cube and time its period queries.
+
+    python -m benchmarks.bench_sqlite [--size 100k]
+
+A synthetic table of the given size is loaded into a KPIDataset and saved to
+a temporary store. Every month, quarter, half and year read back from the
+store must match the cube (same KPIs, order, data types and values). The
+timing compares what a new session needs before its first report: building
+the in-memory dataset from the table versus opening the stored dataset, and
+then one cube lookup versus one SQL query per period type. The query plan
+shows which index serves each period filter.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from utils.compact import compact_kpi_frame
+from utils.dataset import KPIDataset
+from utils.schema import REQUIRED_COLUMNS
+from utils.sqlite_store import _AGGREGATE_QUERY, _PERIOD_FILTERS, _ROWS_QUERY, KPIStore
+from utils.synthetic import DATASET_SIZES, generate_kpi_data, kpis_for_rows
+
+COMPARED = ['department', 'kpi_name', 'data_type']
+
+
+def check_matches_cube(dataset, stored):
+    """Assert that every period of the store equals the cube entry; return the number compared"""
+    assert stored.index.years == dataset.index.years, "years differ"
+    for key in dataset.period_keys():
+        expected = dataset.period_data(*key).reset_index(drop=True)
+        actual = stored.period_data(*key)
+        assert len(actual) == len(expected), key
+        for col in COMPARED:
+            assert actual[col].tolist() == expected[col].astype(object).tolist(), (key, col)
+        np.testing.assert_allclose(actual['value'].to_numpy(dtype=float), expected['value'].to_numpy(dtype=float),
+                                   rtol=1e-9, err_msg=str(key))
+    return len(dataset.cube)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", choices=list(DATASET_SIZES), default="100k")
+    args = parser.parse_args()
+
+    rows, departments = DATASET_SIZES[args.size]
+    df, _ = compact_kpi_frame(generate_kpi_data(kpis=kpis_for_rows(rows), departments=departments))
+    directory = tempfile.mkdtemp(prefix="kpi_store_")
+    try:
+        store = KPIStore(os.path.join(directory, "kpi.db"))
+        dataset, build_seconds = timed(lambda: KPIDataset(df, "bench"))
+        _, save_seconds = timed(lambda: store.save(dataset))
+        stored, open_seconds = timed(lambda: store.open("bench"))
+        compared = check_matches_cube(dataset, stored)
+        print(f"OK: {compared} periods of {len(df)} rows identical in the store "
+              f"({os.path.getsize(store.path) / 1024 / 1024:.1f} MB)")
+        print(f"  save to store:           {save_seconds * 1000:10.1f} ms (once per distinct upload)")
+        print(f"  build in-memory dataset: {build_seconds * 1000:10.1f} ms")
+        print(f"  open stored dataset:     {open_seconds * 1000:10.1f} ms")
+
+        year = dataset.index.years[-1]
+        for period_type, period in [("monthly", 12), ("quarterly", 4), ("half_annual", 2), ("annually", None)]:
+            _, lookup_seconds = timed(lambda: dataset.period_data(period_type, year, period))
+            result, query_seconds = timed(lambda: stored.period_data(period_type, year, period))
+            print(f"  {period_type:<12} cube lookup {lookup_seconds * 1000:8.2f} ms · "
+                  f"SQL {query_seconds * 1000:8.1f} ms ({len(result)} rows returned)")
+
+        print("Query plans:")
+        for period_type, sql_filter in _PERIOD_FILTERS.items():
+            if period_type == "monthly":
+                query = _ROWS_QUERY.format(columns=", ".join(REQUIRED_COLUMNS), period=sql_filter)
+            else:
+                query = _AGGREGATE_QUERY.format(period=sql_filter)
+            plan = store.query("EXPLAIN QUERY PLAN " + query, ("bench",) + (0,) * sql_filter.count("?"))
+            print(f"  {period_type:<12} " + " / ".join(plan['detail']))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Cold-start cost of the dashboard: import time and time to first render.
+
+    python -m benchmarks.bench_startup [--runs 3] [--json startup.json]
+
+Import time comes from `python -X importtime -c "import app"`: the total for
+app.py and its direct imports, slowest first. Time to first render is the
+wall time of a fresh interpreter that imports Streamlit's AppTest and runs
+app.py once (the upload screen), measured from process start. The same
+process reports which of the heavy, path-specific dependencies (ReportLab,
+openpyxl, plotly.express) got imported although no file was uploaded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a file is uploaded or an export is requested
+LAZY_MODULES = ["reportlab", "openpyxl", "plotly.express"]
+
+FIRST_RENDER = f"""
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file("app.py", default_timeout=60)
+app.run()
+done = time.perf_counter()
+print(json.dumps({{
+    'exceptions': [e.value for e in app.exception],
+    'import_seconds': imported - start,
+    'run_seconds': done - imported,
+    'loaded': [name for name in {LAZY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def import_times():
+    """(total microseconds for app, [(module, cumulative us)] of its direct imports)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=APP_DIR,
+                            capture_output=True, text=True, check=True)
+    children, total = [], None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Names are indented two spaces per nesting level, after one separating space
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            children.append((name.strip(), int(cumulative)))
+        elif depth == 0 and name.strip() == "app":
+            total = int(cumulative)
+            break
+        elif depth == 0:
+            children = []
+    return total, sorted(children, key=lambda child: -child[1])
+
+
+def first_render():
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", FIRST_RENDER], cwd=APP_DIR, capture_output=True, text=True,
+                            check=True)
+    wall = time.perf_counter() - start
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['wall_seconds'] = wall
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per measurement (median is shown)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    imports = [import_times() for _ in range(args.runs)]
+    total_ms = statistics.median(total for total, _ in imports) / 1000
+    print(f"import app: {total_ms:.0f} ms (median of {args.runs})")
+    for name, cumulative in imports[-1][1][:10]:
+        print(f"  {name:<30}{cumulative / 1000:>8.1f} ms")
+
+    renders = [first_render() for _ in range(args.runs)]
+    if renders[-1]['exceptions']:
+        sys.exit(f"app.py raised: {renders[-1]['exceptions']}")
+    wall_ms = statistics.median(render['wall_seconds'] for render in renders) * 1000
+    run_ms = statistics.median(render['run_seconds'] for render in renders) * 1000
+    loaded = renders[-1]['loaded']
+    print(f"first render: {wall_ms:.0f} ms from process start ({run_ms:.0f} ms in the first script run)")
+    print(f"heavy modules loaded at start: {', '.join(loaded) if loaded else 'none'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'import_ms': total_ms,
+                'imports': [{'module': name, 'ms': cumulative / 1000} for name, cumulative in imports[-1][1]],
+                'first_render_ms': wall_ms,
+                'first_run_ms': run_ms,
+                'lazy_modules_loaded': loaded,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
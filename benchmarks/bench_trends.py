@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Check the trend pivot against pairwise period comparisons and compare their
+speed.
+
+    python -m benchmarks.bench_trends [--copies 200]
+
+The check compares every consecutive pair of months, quarters, halves and
+years of sample_kpi_data.xlsx with compare_periods and fails if a value or
+period-over-period change of the trend matrix differs. The timing then builds
+the full monthly and quarterly trends of the sample widened to `copies` times
+as many KPIs, once as one filter-aggregate-merge pass per period and once as
+a single pivot.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_aggregation import SAMPLE_FILE, best_of, widen
+from utils.aggregation import aggregate_by_data_type
+from utils.comparison import compare_periods
+from utils.dataset import KPIDataset
+from utils.rollups import PERIOD_TYPES
+from utils.trends import compare_trend, trend_periods
+
+KEYS = ['department', 'kpi_name']
+
+
+def check_matches_pairwise(dataset):
+    """Assert that trend values and changes agree with compare_periods; return the pairs checked"""
+    checked = 0
+    for period_type in PERIOD_TYPES:
+        periods = trend_periods(dataset.cube, period_type)
+        trend = compare_trend(dataset.df, period_type, periods)
+        for i in range(1, len(periods)):
+            expected = compare_periods(dataset.period_data(period_type, *periods[i - 1]),
+                                       dataset.period_data(period_type, *periods[i])).set_index(KEYS)
+            label = trend['labels'][i]
+            actual = pd.DataFrame({
+                'period_1_value': trend['values'].iloc[:, i - 1],
+                'period_2_value': trend['values'].iloc[:, i],
+                'change_percent': trend['pop'].iloc[:, i],
+            }).dropna(subset=['period_1_value', 'period_2_value'])
+            assert sorted(actual.index) == sorted(expected.index), label
+            actual = actual.loc[expected.index]
+            for col in actual.columns:
+                np.testing.assert_allclose(actual[col].to_numpy(), expected[col].to_numpy(dtype=float),
+                                           rtol=1e-12, err_msg=f"{label}: {col}")
+            checked += 1
+    return checked
+
+
+def pairwise_trend(df, period_type, periods):
+    """One filter-aggregate-merge pass per period, as repeated two-period comparisons would do"""
+    period_col = {"monthly": 'month', "quarterly": 'quarter'}[period_type]
+    matrix = None
+    for year, period in periods:
+        rows = df[(df['year'] == year) & (df[period_col] == period)]
+        values = aggregate_by_data_type(rows)[KEYS + ['value']].rename(columns={'value': (year, period)})
+        matrix = values if matrix is None else matrix.merge(values, on=KEYS, how='outer')
+    return matrix.set_index(KEYS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--copies", type=int, default=200, help="how many times to repeat the sample KPIs")
+    args = parser.parse_args()
+
+    df = pd.read_excel(SAMPLE_FILE)
+    checked = check_matches_pairwise(KPIDataset(df, "sample"))
+    print(f"OK: trend values and changes match compare_periods for {checked} period pairs of {SAMPLE_FILE}")
+
+    dataset = KPIDataset(widen(df, args.copies), "wide")
+    kpis = dataset.df[KEYS].drop_duplicates().shape[0]
+    print(f"Full trends of {kpis} KPIs ({len(dataset.df)} rows):")
+    for period_type in ["monthly", "quarterly"]:
+        periods = trend_periods(dataset.cube, period_type)
+        pairwise_time = best_of(lambda: pairwise_trend(dataset.df, period_type, periods))
+        pivot_time = best_of(lambda: compare_trend(dataset.df, period_type, periods))
+        print(f"  {period_type} ({len(periods)} periods):")
+        print(f"    pass per period: {pairwise_time * 1000:8.1f} ms")
+        print(f"    single pivot:    {pivot_time * 1000:8.1f} ms  ({pairwise_time / pivot_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
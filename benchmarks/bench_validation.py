@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Check that bad rows are reported, not fatal, whichever reader loads them, and time the validation pass.
+
+    python -m benchmarks.bench_validation [--size 100k]
+
+A small workbook with one bad cell of each kind (a value "abc", "n/a" or
+empty, a month "Jan", 13 or 0, an empty year or quarter, a quarter that does
+not match its month, an unknown or changing data_type, an "NA" label) is
+loaded with pd.read_excel, with the streaming reader and twice with sidecars
+on. Every load must succeed, give the same table and the same validation
+counts, and build a dataset whose periods can all be read and planned as
+batch reports. A workbook whose columns mix numbers and text gets no
+sidecar, so the same check runs again without the text cells, where the
+second load must come from the sidecar. Two workbooks, one of them with an
+entirely empty department and data_type column, must also load together. The
+timing covers validate_kpi_table and usable_rows on a synthetic table of the
+given size.
+"""
+import argparse
+import io
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from batch_reports import plan_jobs
+from utils.compact import compact_kpi_frame
+from utils.dataset import KPIDataset
+from utils.ingest import load_workbooks
+from utils.synthetic import DATASET_SIZES, generate_kpi_data, kpis_for_rows
+from utils.validation import usable_rows, validate_kpi_table
+
+# (table position, column, cell) written over clean rows, and the counts they must produce
+BAD_CELLS = [
+    (3, 'value', "abc"),
+    (11, 'value', "n/a"),
+    (19, 'value', None),
+    (27, 'month', "Jan"),
+    (35, 'month', 13),
+    (43, 'year', None),
+    (51, 'quarter', 4),
+    (59, 'data_type', "pct"),
+    (65, 'data_type', "number"),
+    (75, 'quarter', None),
+    (83, 'month', 0),
+    # No check of their own, but both readers must read them as missing
+    (91, 'kpi_name', "NA"),
+    (99, 'department', "n/a"),
+]
+EXPECTED_COUNTS = {'month': 2, 'quarter': 1, 'non_numeric': 2, 'missing': 4, 'data_type': 1,
+                   'data_type_changed': 1}
+EXPECTED_LEFT_OUT = 3
+TEXT_CELLS = ["abc", "Jan"]
+
+
+def workbook_bytes(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def bad_workbook(text_cells=True):
+    """xlsx bytes of a clean sample table with BAD_CELLS (optionally without TEXT_CELLS) written into it"""
+    # Eight KPIs per month, in kpi_id order; row 65 is a "percentage" KPI in its ninth month
+    df = generate_kpi_data(kpis=8, departments=4).astype(object)
+    for position, col, cell in BAD_CELLS:
+        if text_cells or cell not in TEXT_CELLS:
+            df.at[position, col] = cell
+    return workbook_bytes(df)
+
+
+def check_empty_category_columns():
+    """Assert that a workbook whose label columns are all empty loads together with a normal one"""
+    clean = generate_kpi_data(kpis=8, departments=4)
+    empty = clean.astype(object).assign(department=None, data_type=None, year=clean['year'] + len(clean))
+    files = [("clean.xlsx", workbook_bytes(clean)), ("empty.xlsx", workbook_bytes(empty))]
+    df, _, _ = load_workbooks(files, sidecar_dir=None)
+    assert len(df) == 2 * len(clean), len(df)
+    assert sorted(df['department'].dropna().unique()) == sorted(clean['department'].unique())
+    KPIDataset(df, "empty_category_columns")
+
+
+def load_bad_workbook(data, sidecar_dir):
+    """(table, validation report) of every way the workbook can be loaded"""
+    files = [("bad.xlsx", data)]
+    loads = {
+        'read_excel': load_workbooks(files, streaming_threshold=len(data) + 1, sidecar_dir=None),
+        'streaming': load_workbooks(files, streaming_threshold=0, sidecar_dir=None),
+        'sidecar_write': load_workbooks(files, streaming_threshold=len(data) + 1, sidecar_dir=sidecar_dir),
+        'sidecar_read': load_workbooks(files, streaming_threshold=len(data) + 1, sidecar_dir=sidecar_dir),
+    }
+    sidecar_used = loads['sidecar_read'][2]['files'][0]['sidecar']
+    return {name: (df, load_report['validation']) for name, (df, _, load_report) in loads.items()}, sidecar_used
+
+
+def check_bad_rows(loads):
+    """Assert that every load gives the same table and report as read_excel, and that the dataset builds"""
+    expected_df, expected_report = loads['read_excel']
+    for name, (df, report) in loads.items():
+        assert report['counts'] == expected_report['counts'], (name, report['counts'])
+        assert [error['row'] for error in report['errors']] == [error['row'] for error in expected_report['errors']]
+        pd.testing.assert_frame_equal(df.astype(object), expected_df.astype(object), obj=name)
+        for col in ['value', 'year', 'month', 'quarter']:
+            assert pd.api.types.is_numeric_dtype(df[col]), (name, col, df[col].dtype)
+
+        dataset = KPIDataset(df, name)
+        for key in dataset.period_keys():
+            dataset.period_data(*key)
+        plan_jobs(dataset)
+    return expected_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", choices=list(DATASET_SIZES), default="100k")
+    args = parser.parse_args()
+
+    sidecar_dir = tempfile.mkdtemp(prefix="kpi_sidecars_")
+    try:
+        loads, _ = load_bad_workbook(bad_workbook(), sidecar_dir)
+        report = check_bad_rows(loads)
+        assert report['counts'] == EXPECTED_COUNTS, report['counts']
+        assert report['rows_left_out'] == EXPECTED_LEFT_OUT, report['rows_left_out']
+        loads, sidecar_used = load_bad_workbook(bad_workbook(text_cells=False), sidecar_dir)
+        check_bad_rows(loads)
+        assert sidecar_used, "sidecar not used for the workbook without text cells"
+        check_empty_category_columns()
+    finally:
+        shutil.rmtree(sidecar_dir)
+    problems = ", ".join(f"{check} {count}" for check, count in report['counts'].items())
+    print(f"OK: read_excel, streaming, sidecar-enabled and sidecar loads agree ({problems}; "
+          f"{report['rows_left_out']} rows without a period left out)")
+
+    rows, departments = DATASET_SIZES[args.size]
+    df, _ = compact_kpi_frame(generate_kpi_data(kpis=kpis_for_rows(rows), departments=departments))
+    start = time.perf_counter()
+    validate_kpi_table(df)
+    validate_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    usable_rows(df)
+    usable_seconds = time.perf_counter() - start
+    print(f"{len(df)} rows: validate_kpi_table {validate_seconds * 1000:.1f} ms · "
+          f"usable_rows {usable_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Headless benchmark of every pipeline stage at several data scales.
+
+    python -m benchmarks.suite [--sizes 10k 100k] [--save] [--threshold 0.25]
+
+For each named size from utils.synthetic a workbook is generated once (and
+kept in .benchmark_data/), then the stages the dashboard runs are timed in
+order:
+
+    excel_parse     read every sheet into the compact table (load_workbooks)
+    sidecar_write   store that table as the workbook's Arrow sidecar
+    sidecar_load    load the same workbook again, memory-mapped from the sidecar
+    validation      required columns, column types and row checks
+    aggregation     period index and every month/quarter/half/year rollup
+    comparison      merge of the last two years and change_percent
+    pdf_report      create_pdf_report for the last year
+    pdf_comparison  create_comparison_pdf for the last two years
+    csv_export      CSV of that report and comparison
+
+Wall time is the best of --repeat runs; peak memory is the largest amount
+allocated during one extra, traced run of the stage. Results are compared
+with the JSON baseline (benchmarks/baseline.json by default) and any stage
+that got slower or bigger by more than --threshold is reported as a
+regression, with exit status 1. --save writes the results as the new
+baseline.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from utils.comparison import compare_periods
+from utils.dataset import KPIDataset
+from utils.ingest import fingerprint_bytes, load_workbooks
+from utils.pdf_reports import create_comparison_pdf, create_pdf_report
+from utils.rollups import period_name, value_type_label
+from utils.schema import REQUIRED_COLUMNS, MissingColumnsError
+from utils.sidecar import write_sidecar
+from utils.synthetic import DATASET_SIZES, iter_kpi_chunks, kpis_for_rows, write_excel
+from utils.validation import validate_kpi_table
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DATA_DIR = ".benchmark_data"
+SIDECAR_DIR = os.path.join(DATA_DIR, "sidecars")
+
+# Stages faster than this are too noisy to flag on a relative change alone
+MIN_SECONDS = 0.005
+MIN_PEAK_MB = 1.0
+
+
+def workbook_for(size):
+    """Path of the generated workbook for a named size, generating it on first use"""
+    path = os.path.join(DATA_DIR, f"kpi_data_{size}.xlsx")
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        rows, departments = DATASET_SIZES[size]
+        print(f"Generating {path} ({rows} rows)...", flush=True)
+        write_excel(iter_kpi_chunks(kpis=kpis_for_rows(rows), departments=departments), path)
+    return path
+
+
+def validate(df):
+    """The column and row checks run on upload"""
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise MissingColumnsError(df.columns)
+    return validate_kpi_table(df)
+
+
+def pipeline(file_name, data):
+    """(stage, function) pairs; each function gets the results of the earlier stages"""
+    def last_years(state):
+        years = state['aggregation'].index.years
+        return years[-2], years[-1]
+
+    def report(state):
+        year = last_years(state)[1]
+        return state['aggregation'].period_data("annually", year)
+
+    return [
+        ("excel_parse", lambda state: load_workbooks([(file_name, data)], max_workers=1, sidecar_dir=None)[0]),
+        ("sidecar_write", lambda state: write_sidecar(SIDECAR_DIR, fingerprint_bytes(data), state['excel_parse'])),
+        ("sidecar_load", lambda state: load_workbooks([(file_name, data)], sidecar_dir=SIDECAR_DIR)[0]),
+        ("validation", lambda state: validate(state['excel_parse'])),
+        ("aggregation", lambda state: KPIDataset(state['excel_parse'], fingerprint_bytes(data))),
+        ("comparison", lambda state: compare_periods(
+            *(state['aggregation'].period_data("annually", year) for year in last_years(state)))),
+        ("pdf_report", lambda state: create_pdf_report(
+            report(state), period_name("annually", last_years(state)[1], None),
+            value_type_label("annually")).read()),
+        ("pdf_comparison", lambda state: create_comparison_pdf(
+            state['comparison'], *(period_name("annually", year, None) for year in last_years(state))).read()),
+        ("csv_export", lambda state: (report(state).to_csv(index=False), state['comparison'].to_csv(index=False))),
+    ]
+
+
+def measure(func, state, repeat):
+    """Run a stage: (result, best wall seconds, traced peak MB)"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(state)
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, min(timings), peak / 1024 / 1024
+
+
+def run_size(size, repeat):
+    path = workbook_for(size)
+    with open(path, 'rb') as f:
+        data = f.read()
+    state, results = {}, {}
+    for stage, func in pipeline(os.path.basename(path), data):
+        state[stage], seconds, peak_mb = measure(func, state, repeat)
+        results[stage] = {'seconds': round(seconds, 6), 'peak_mb': round(peak_mb, 3)}
+        print(f"  {stage:<16}{seconds * 1000:>12.1f} ms{peak_mb:>12.1f} MB", flush=True)
+    results['rows'] = len(state['excel_parse'])
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    """(size, stage, metric, old, new) for every measurement that grew by more than threshold"""
+    regressions = []
+    for size, stages in results.items():
+        for stage, measurement in stages.items():
+            previous = baseline.get(size, {}).get(stage)
+            if not isinstance(previous, dict):
+                continue
+            for metric, floor in (('seconds', MIN_SECONDS), ('peak_mb', MIN_PEAK_MB)):
+                old, new = previous[metric], measurement[metric]
+                if new > max(old, floor) * (1 + threshold):
+                    regressions.append((size, stage, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(DATASET_SIZES), default=["10k", "100k"])
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (the best is kept)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative growth before flagging")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        print(f"{size}:")
+        results[size] = run_size(size, args.repeat)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    status = 0
+    if baseline is not None:
+        regressions = find_regressions(results, baseline['results'], args.threshold)
+        for size, stage, metric, old, new in regressions:
+            growth = f"{(new / old - 1) * 100:+.0f}%" if old else "was 0"
+            print(f"REGRESSION {size} {stage} {metric}: {old} -> {new} ({growth})")
+        if regressions:
+            status = 1
+        else:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+    if args.save:
+        if baseline is not None:
+            # Sizes not run this time keep their previous numbers
+            results = {**baseline['results'], **results}
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'results': results,
+            }, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
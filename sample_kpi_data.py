@@ -1,103 +1,29 @@
 #!/usr/bin/env python3
 """
 Create a sample KPI Excel file for testing the dashboard
+
+    python sample_kpi_data.py                       # sample_kpi_data.xlsx, 8 KPIs x 36 months
+    python sample_kpi_data.py --size 1m --format parquet
+    python sample_kpi_data.py --kpis 500 --departments 12 --years 5 -o kpi_500
+
+Without options this writes the same data as always. Larger datasets are
+generated and written in chunks; Excel output is split over several sheets
+once a sheet is full, and Parquet is the much faster format for big tables.
 """
-import pandas as pd
-import numpy as np
-from datetime import datetime
+import argparse
+import time
+
+from utils.synthetic import (DATASET_SIZES, DEFAULT_SEED, DEFAULT_START_YEAR, DEFAULT_YEARS, KPI_PROFILES,
+                             generate_kpi_data, iter_kpi_chunks, kpis_for_rows, write_excel, write_parquet)
+
+WRITERS = {"xlsx": write_excel, "parquet": write_parquet}
+
 
 def create_sample_kpi_data():
     """Create sample KPI data for demonstration"""
-    
-    # Define KPIs with departments and data types
-    kpis = [
-        {"id": 1, "name": "Revenue", "department": "Sales", "data_type": "number"},
-        {"id": 2, "name": "Customer Satisfaction", "department": "Customer Service", "data_type": "percentage"},
-        {"id": 3, "name": "Sales Volume", "department": "Sales", "data_type": "number"},
-        {"id": 4, "name": "Website Traffic", "department": "Marketing", "data_type": "number"},
-        {"id": 5, "name": "Conversion Rate", "department": "Marketing", "data_type": "percentage"},
-        {"id": 6, "name": "Employee Satisfaction", "department": "HR", "data_type": "percentage"},
-        {"id": 7, "name": "Production Efficiency", "department": "Operations", "data_type": "percentage"},
-        {"id": 8, "name": "Cost per Acquisition", "department": "Marketing", "data_type": "number"}
-    ]
-    
-    # Generate data for 2022-2024
-    years = [2022, 2023, 2024]
-    months = list(range(1, 13))
-    
-    data = []
-    
-    # Generate realistic sample data
-    np.random.seed(42)  # For consistent results
-    
-    for year in years:
-        for month in months:
-            quarter = ((month - 1) // 3) + 1
-            
-            for kpi in kpis:
-                # Create different patterns for different KPIs
-                if kpi["name"] == "Revenue":
-                    # Revenue grows over time with seasonal patterns
-                    base_value = 50000 + (year - 2022) * 10000
-                    seasonal_factor = 1.2 if month in [11, 12] else 1.0  # Holiday boost
-                    monthly_variation = np.random.normal(1.0, 0.1)
-                    value = base_value * seasonal_factor * monthly_variation
-                    
-                elif kpi["name"] == "Customer Satisfaction":
-                    # Customer satisfaction as percentage (70-95%)
-                    base_value = 80 + (year - 2022) * 2
-                    value = base_value + np.random.normal(0, 3)
-                    value = max(70, min(95, value))  # Keep within reasonable bounds
-                    
-                elif kpi["name"] == "Sales Volume":
-                    # Sales volume in units
-                    base_value = 1000 + (year - 2022) * 200
-                    seasonal_factor = 1.3 if month in [11, 12] else 1.0
-                    value = base_value * seasonal_factor * np.random.normal(1.0, 0.15)
-                    
-                elif kpi["name"] == "Website Traffic":
-                    # Website visitors
-                    base_value = 25000 + (year - 2022) * 5000
-                    value = base_value * np.random.normal(1.0, 0.2)
-                    
-                elif kpi["name"] == "Conversion Rate":
-                    # Conversion rate as percentage (2-8%)
-                    base_value = 4 + (year - 2022) * 0.5
-                    value = base_value + np.random.normal(0, 0.5)
-                    value = max(2, min(8, value))
-                
-                elif kpi["name"] == "Employee Satisfaction":
-                    # Employee satisfaction as percentage (60-90%)
-                    base_value = 75 + (year - 2022) * 1
-                    value = base_value + np.random.normal(0, 2)
-                    value = max(60, min(90, value))
-                
-                elif kpi["name"] == "Production Efficiency":
-                    # Production efficiency as percentage (70-95%)
-                    base_value = 80 + (year - 2022) * 2
-                    value = base_value + np.random.normal(0, 3)
-                    value = max(70, min(95, value))
-                
-                elif kpi["name"] == "Cost per Acquisition":
-                    # Cost per acquisition in dollars (decreasing is better)
-                    base_value = 50 - (year - 2022) * 5  # Improving over time
-                    value = base_value * np.random.normal(1.0, 0.1)
-                    value = max(20, value)  # Keep above minimum
-                
-                data.append({
-                    "kpi_id": kpi["id"],
-                    "kpi_name": kpi["name"],
-                    "department": kpi["department"],
-                    "month": month,
-                    "quarter": quarter,
-                    "year": year,
-                    "value": round(value, 2),
-                    "data_type": kpi["data_type"]
-                })
-    
-    # Create DataFrame
-    df = pd.DataFrame(data)
-    
+
+    df = generate_kpi_data()
+
     # Save to Excel file
     df.to_excel("sample_kpi_data.xlsx", index=False)
     print(f"Created sample_kpi_data.xlsx with {len(df)} records")
@@ -105,8 +31,42 @@ def create_sample_kpi_data():
     print(df.head(10))
     print(f"\nData covers years: {df['year'].min()} - {df['year'].max()}")
     print(f"KPIs included: {', '.join(df['kpi_name'].unique())}")
-    
+
     return df
 
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", choices=list(DATASET_SIZES), help="named benchmark dataset (rows and departments)")
+    parser.add_argument("--rows", type=int, help="generate at least this many rows (sets the number of KPIs)")
+    parser.add_argument("--kpis", type=int, help=f"number of KPIs (default {len(KPI_PROFILES)})")
+    parser.add_argument("--departments", type=int, help="spread KPIs over this many departments")
+    parser.add_argument("--years", type=int, default=DEFAULT_YEARS)
+    parser.add_argument("--start-year", type=int, default=DEFAULT_START_YEAR)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--format", choices=["xlsx", "parquet", "both"], default="xlsx")
+    parser.add_argument("-o", "--output", help="output path without extension")
+    args = parser.parse_args()
+
+    if vars(args) == vars(parser.parse_args([])):
+        create_sample_kpi_data()
+        return
+
+    rows, departments = DATASET_SIZES[args.size] if args.size else (args.rows, args.departments)
+    if args.departments is not None:
+        departments = args.departments
+    kpis = args.kpis or (kpis_for_rows(rows, args.years) if rows else len(KPI_PROFILES))
+    output = args.output or (f"kpi_data_{args.size}" if args.size else "sample_kpi_data")
+    settings = dict(kpis=kpis, departments=departments, start_year=args.start_year, years=args.years, seed=args.seed)
+
+    formats = ["xlsx", "parquet"] if args.format == "both" else [args.format]
+    for file_format in formats:
+        start = time.perf_counter()
+        written = WRITERS[file_format](iter_kpi_chunks(**settings), f"{output}.{file_format}")
+        elapsed = time.perf_counter() - start
+        print(f"Created {output}.{file_format} with {written} records ({kpis} KPIs, {args.years} years) "
+              f"in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)")
+
+
 if __name__ == "__main__":
-    create_sample_kpi_data()
\ No newline at end of file
+    main()
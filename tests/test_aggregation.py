@@ -0,0 +1,49 @@
+"""The vectorized aggregation engine must match the per-group loop it replaced."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_aggregation import legacy_aggregate
+from utils.aggregation import aggregate_by_data_type
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sample_kpi_data.xlsx")
+
+
+def period_slices(df):
+    """(label, rows) of every quarter, half and year in the data"""
+    slices = []
+    for year in sorted(df['year'].unique()):
+        year_rows = df[df['year'] == year]
+        for quarter in sorted(year_rows['quarter'].unique()):
+            slices.append((f"Q{quarter} {year}", year_rows[year_rows['quarter'] == quarter]))
+        slices.append((f"H1 {year}", year_rows[year_rows['month'].isin([1, 2, 3, 4, 5, 6])]))
+        slices.append((f"H2 {year}", year_rows[year_rows['month'].isin([7, 8, 9, 10, 11, 12])]))
+        slices.append((f"Year {year}", year_rows))
+    return slices
+
+
+SAMPLE_PERIODS = period_slices(pd.read_excel(SAMPLE_FILE))
+
+
+@pytest.mark.parametrize("rows", [rows for _, rows in SAMPLE_PERIODS], ids=[label for label, _ in SAMPLE_PERIODS])
+def test_matches_legacy_loop(rows):
+    expected = legacy_aggregate(rows)
+    actual = aggregate_by_data_type(rows)
+    assert list(actual.columns) == list(expected.columns)
+    for col in ['department', 'kpi_name', 'data_type']:
+        assert actual[col].tolist() == expected[col].tolist(), col
+    np.testing.assert_allclose(actual['value'].to_numpy(), expected['value'].to_numpy(), rtol=1e-12)
+
+
+def test_percentages_averaged_and_numbers_summed():
+    rows = pd.DataFrame({
+        'department': ["Sales", "Sales", "Sales", "Sales"],
+        'kpi_name': ["Revenue", "Revenue", "Margin", "Margin"],
+        'value': [100.0, 50.0, 10.0, 20.0],
+        'data_type': ["number", "number", "percentage", "percentage"],
+    })
+    result = aggregate_by_data_type(rows).set_index('kpi_name')['value']
+    assert result['Revenue'] == 150.0
+    assert result['Margin'] == 15.0
@@ -0,0 +1 @@
+"""Data handling helpers for the KPI dashboard."""
@@ -0,0 +1,35 @@
+"""
+Vectorized KPI aggregation.
+
+Aggregated periods average percentage KPIs and sum number KPIs. Instead of
+looping over department/KPI groups in Python, the sum and mean of every group
+are computed in a single groupby().agg call and the right one is picked per
+row with an array select on data_type.
+"""
+import numpy as np
+import pandas as pd
+
+AGGREGATE_COLUMNS = ['department', 'kpi_name', 'value', 'data_type']
+
+
+def aggregate_by_data_type(df, period_keys=()):
+    """
+    Aggregate values per department/KPI, optionally for many periods at once.
+
+    period_keys are extra leading group columns (e.g. ['year', 'quarter']) so a
+    whole set of periods can be rolled up in one call. The result has one row
+    per group with the period keys followed by department, kpi_name, value and
+    data_type, sorted the same way as a plain groupby.
+    """
+    keys = list(period_keys) + ['department', 'kpi_name']
+    if df.empty:
+        return pd.DataFrame(columns=keys[:-2] + AGGREGATE_COLUMNS)
+
+    stats = df.groupby(keys, sort=True, observed=True).agg(
+        value_sum=('value', 'sum'),
+        value_mean=('value', 'mean'),
+        data_type=('data_type', 'first'),
+    ).reset_index()
+
+    stats['value'] = np.where(stats['data_type'] == "percentage", stats['value_mean'], stats['value_sum'])
+    return stats[keys[:-2] + AGGREGATE_COLUMNS]
@@ -0,0 +1,59 @@
+"""
+HTML for the report view's KPI cards.
+
+All cards of a department are rendered as one CSS grid block, so a
+department costs a single st.markdown element instead of one per card plus
+one st.columns row per pair of cards.
+"""
+import html
+
+import numpy as np
+
+# Card and department-header styles, injected once per page with the global styles
+REPORT_CSS = """
+    /* KPI report cards */
+    .kpi-grid {
+        display: grid;
+        grid-template-columns: repeat(2, minmax(0, 1fr));
+        column-gap: 1rem;
+    }
+    
+    .kpi-card {
+        background: linear-gradient(135deg, #00D4AA 0%, #4AE54A 100%);
+        color: white;
+        padding: 1rem;
+        border-radius: 10px;
+        margin: 0.5rem 0;
+        box-shadow: 0 4px 6px rgba(0, 212, 170, 0.2);
+    }
+    .kpi-name {
+        font-size: 0.9rem;
+        font-weight: 500;
+        margin-bottom: 0.3rem;
+    }
+    .kpi-value {
+        font-size: 1.5rem;
+        font-weight: bold;
+    }
+    .dept-header {
+        background: linear-gradient(90deg, #00D4AA 0%, #2DD4BF 100%);
+        color: white;
+        padding: 1rem;
+        border-radius: 8px;
+        margin: 1rem 0 0.5rem 0;
+        font-size: 1.2rem;
+        font-weight: bold;
+        text-align: center;
+    }
+"""
+
+
+def kpi_grid_html(dept_data):
+    """One HTML block with a card per KPI, two cards per row"""
+    names = [html.escape(str(name)) for name in dept_data['kpi_name']]
+    values = np.char.mod("%.2f", dept_data['value'].to_numpy(dtype=float))
+    cards = "".join(
+        f'<div class="kpi-card"><div class="kpi-name">📊 {name}</div><div class="kpi-value">{value}</div></div>'
+        for name, value in zip(names, values)
+    )
+    return f'<div class="kpi-grid">{cards}</div>'
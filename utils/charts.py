@@ -0,0 +1,169 @@
+"""
+Plotly figures for period comparisons.
+
+A department's comparison can be drawn as one figure - grouped bars or small
+multiples - instead of one figure per KPI, which keeps the number of charts
+serialised to the browser at one per department. Departments with more than
+MAX_CHART_KPIS KPIs fall back to a single change-% summary bar chart.
+Trends over many periods are drawn as one line chart per department.
+"""
+import math
+
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+CHART_MODES = ["grouped", "small_multiples", "per_kpi"]
+CHART_MODE_LABELS = {"grouped": "Grouped bars", "small_multiples": "Small multiples", "per_kpi": "One chart per KPI"}
+
+PERIOD_1_COLOR = '#00D4AA'
+PERIOD_2_COLOR = '#9C27B0'
+
+# Above this many KPIs in a department, draw the change summary instead of values
+MAX_CHART_KPIS = 40
+SMALL_MULTIPLE_COLUMNS = 3
+
+_GRID = dict(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+_TRANSPARENT = dict(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+
+
+def _change_text(change_pct):
+    return f" ({change_pct:+.1f}%)" if pd.notna(change_pct) else ""
+
+
+def kpi_comparison_figure(kpi_row, period_1_name, period_2_name):
+    """Bar chart of one KPI in both periods"""
+    kpi_name = kpi_row['kpi_name']
+    period_1_value = kpi_row['period_1_value']
+    period_2_value = kpi_row['period_2_value']
+    
+    fig = go.Figure()
+    
+    # Add bar chart for comparison
+    fig.add_trace(go.Bar(
+        x=[period_1_name, period_2_name],
+        y=[period_1_value, period_2_value],
+        marker_color=[PERIOD_1_COLOR, PERIOD_2_COLOR],
+        text=[f'{period_1_value:.2f}', f'{period_2_value:.2f}'],
+        textposition='auto',
+        name=kpi_name
+    ))
+    
+    fig.update_layout(
+        title=f"{kpi_name}{_change_text(kpi_row['change_percent'])}",
+        xaxis_title="Periods",
+        yaxis_title="Value",
+        height=300,
+        showlegend=False,
+        xaxis=_GRID,
+        yaxis=_GRID,
+        **_TRANSPARENT
+    )
+    return fig
+
+
+def grouped_comparison_figure(dept_data, period_1_name, period_2_name):
+    """All KPIs of a department side by side, one bar per period"""
+    kpi_names = dept_data['kpi_name'].astype(str).tolist()
+    fig = go.Figure()
+    for column, name, color in [('period_1_value', period_1_name, PERIOD_1_COLOR),
+                                ('period_2_value', period_2_name, PERIOD_2_COLOR)]:
+        values = dept_data[column].to_numpy()
+        fig.add_trace(go.Bar(
+            x=kpi_names,
+            y=values,
+            name=name,
+            marker_color=color,
+            text=[f'{v:.2f}' for v in values],
+            textposition='auto',
+        ))
+    
+    fig.update_layout(
+        barmode='group',
+        xaxis_title="KPI",
+        yaxis_title="Value",
+        height=400,
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        xaxis=_GRID,
+        yaxis=_GRID,
+        **_TRANSPARENT
+    )
+    return fig
+
+
+def small_multiples_figure(dept_data, period_1_name, period_2_name, columns=SMALL_MULTIPLE_COLUMNS):
+    """One small bar chart per KPI, all in a single figure with independent y axes"""
+    titles = [f"{row.kpi_name}{_change_text(row.change_percent)}" for row in dept_data.itertuples()]
+    rows = math.ceil(len(titles) / columns)
+    fig = make_subplots(rows=rows, cols=columns, subplot_titles=titles,
+                        vertical_spacing=min(0.12, 0.3 / rows), horizontal_spacing=0.08)
+    
+    for i, row in enumerate(dept_data.itertuples()):
+        fig.add_trace(go.Bar(
+            x=[period_1_name, period_2_name],
+            y=[row.period_1_value, row.period_2_value],
+            marker_color=[PERIOD_1_COLOR, PERIOD_2_COLOR],
+            text=[f'{row.period_1_value:.2f}', f'{row.period_2_value:.2f}'],
+            textposition='auto',
+            name=str(row.kpi_name),
+        ), row=i // columns + 1, col=i % columns + 1)
+    
+    fig.update_layout(height=260 * rows, showlegend=False, **_TRANSPARENT)
+    fig.update_yaxes(**_GRID)
+    return fig
+
+
+def change_summary_figure(dept_data):
+    """Horizontal bars of the change % of every KPI, largest movers at the top"""
+    data = dept_data.assign(abs_change=dept_data['change_percent'].abs()).sort_values('abs_change', na_position='first')
+    changes = data['change_percent'].to_numpy()
+    fig = go.Figure(go.Bar(
+        x=changes,
+        y=data['kpi_name'].astype(str).tolist(),
+        orientation='h',
+        marker_color=[PERIOD_2_COLOR if c < 0 else PERIOD_1_COLOR for c in changes],
+    ))
+    fig.update_layout(
+        xaxis_title="Change %",
+        height=max(300, 18 * len(data)),
+        showlegend=False,
+        xaxis=_GRID,
+        **_TRANSPARENT
+    )
+    return fig
+
+
+def department_comparison_figures(dept_data, period_1_name, period_2_name, mode="grouped",
+                                  max_kpis=MAX_CHART_KPIS):
+    """
+    Figures to draw for one department in the given chart mode.
+
+    Returns (figures, summarized) where summarized is True when the department
+    had too many KPIs and only the change summary is drawn.
+    """
+    if len(dept_data) > max_kpis:
+        return [change_summary_figure(dept_data)], True
+    if mode == "small_multiples":
+        return [small_multiples_figure(dept_data, period_1_name, period_2_name)], False
+    if mode == "per_kpi":
+        return [kpi_comparison_figure(row, period_1_name, period_2_name) for _, row in dept_data.iterrows()], False
+    return [grouped_comparison_figure(dept_data, period_1_name, period_2_name)], False
+
+
+def trend_figure(dept_values):
+    """One line per KPI across the periods of a trend (rows are KPIs, columns periods)"""
+    labels = [str(label) for label in dept_values.columns]
+    fig = go.Figure()
+    for (_, kpi_name), values in zip(dept_values.index, dept_values.to_numpy()):
+        fig.add_trace(go.Scatter(x=labels, y=values, mode='lines+markers', name=str(kpi_name)))
+    
+    fig.update_layout(
+        xaxis_title="Period",
+        yaxis_title="Value",
+        height=400,
+        legend=dict(orientation='h', yanchor='top', y=-0.25),
+        xaxis=_GRID,
+        yaxis=_GRID,
+        **_TRANSPARENT
+    )
+    return fig
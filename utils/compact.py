@@ -0,0 +1,90 @@
+"""
+Compact in-memory representation of the KPI table.
+
+pd.read_excel keeps text columns as Python object strings and integers as
+int64. Label columns are repeated on every row, so they become categoricals;
+period columns only need a few bits, so they become int8/int16.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+CATEGORY_COLUMNS = ['kpi_name', 'department', 'data_type']
+NARROW_INT_COLUMNS = {'month': np.int8, 'quarter': np.int8, 'year': np.int16}
+
+# Float type used for KPI values; float32 halves the column at the cost of precision
+VALUE_DTYPE = os.environ.get("KPI_VALUE_DTYPE", "float64")
+
+
+def frame_nbytes(df):
+    """Approximate in-memory size of a DataFrame, including string payloads"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _fits(series, dtype):
+    """True if every value is a whole number representable in dtype"""
+    if not pd.api.types.is_numeric_dtype(series) or series.isna().any():
+        return False
+    if len(series) == 0:
+        return True
+    info = np.iinfo(dtype)
+    values = series.to_numpy()
+    return bool((values == np.round(values)).all() and values.min() >= info.min and values.max() <= info.max)
+
+
+def compact_kpi_frame(df, value_dtype=VALUE_DTYPE):
+    """
+    Return a compact copy of a KPI table and a memory report.
+
+    Columns that cannot be narrowed safely (e.g. a month column holding text)
+    are left untouched so validation can still report on them.
+    """
+    bytes_before = frame_nbytes(df)
+    compact = df.copy()
+
+    for col in CATEGORY_COLUMNS:
+        if not isinstance(compact[col].dtype, pd.CategoricalDtype):
+            compact[col] = compact[col].astype('category')
+
+    for col, dtype in NARROW_INT_COLUMNS.items():
+        if _fits(compact[col], dtype):
+            compact[col] = compact[col].astype(dtype)
+
+    if pd.api.types.is_integer_dtype(compact['kpi_id']):
+        compact['kpi_id'] = pd.to_numeric(compact['kpi_id'], downcast='integer')
+
+    if pd.api.types.is_numeric_dtype(compact['value']):
+        compact['value'] = compact['value'].astype(value_dtype)
+
+    report = {'bytes_before': bytes_before, 'bytes_after': frame_nbytes(compact)}
+    return compact, report
+
+
+def _common_categories(columns):
+    """
+    Categorical columns with one category type, as union_categoricals requires.
+
+    An entirely empty column gets float categories, and a column of numbers
+    numeric ones; when the types differ, every category becomes text.
+    """
+    if len({str(column.cat.categories.dtype) for column in columns}) == 1:
+        return columns
+    return [column.cat.rename_categories(column.cat.categories.astype(str)) for column in columns]
+
+
+def concat_compact(frames):
+    """Concatenate compact tables, merging their category sets"""
+    # Empty frames carry no type information worth keeping
+    frames = [frame for frame in frames if len(frame)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+    categories = {
+        col: union_categoricals(_common_categories([frame[col] for frame in frames]), sort_categories=True)
+        for col in CATEGORY_COLUMNS
+    }
+    combined = pd.concat([frame.drop(columns=CATEGORY_COLUMNS) for frame in frames], ignore_index=True)
+    for col, values in categories.items():
+        combined[col] = values
+    return combined[list(frames[0].columns)]
@@ -0,0 +1,35 @@
+"""Period-over-period comparison of KPI values."""
+
+COMPARISON_CSV_COLUMNS = ['department', 'kpi_name', 'period_1_value', 'period_2_value', 'change_percent']
+
+
+def change_percent(old_values, new_values):
+    """Percentage change relative to the magnitude of the old value"""
+    return ((new_values - old_values) / old_values.abs()) * 100
+
+
+def compare_periods(data_1, data_2):
+    """
+    Join two period frames on department/KPI and compute the change.
+
+    Only KPIs present in both periods are kept; the result is empty when the
+    periods share no KPI.
+    """
+    # Merge data for comparison
+    comparison_data = data_1.merge(
+        data_2, 
+        on=['department', 'kpi_name'], 
+        suffixes=('_1', '_2'),
+        how='inner'
+    )
+    
+    # Rename columns for clarity
+    comparison_data = comparison_data.rename(columns={
+        'value_1': 'period_1_value',
+        'value_2': 'period_2_value'
+    })
+    
+    # Calculate percentage change
+    comparison_data['change_percent'] = change_percent(comparison_data['period_1_value'],
+                                                       comparison_data['period_2_value'])
+    return comparison_data
@@ -0,0 +1,82 @@
+"""
+In-memory representation of an ingested KPI workbook.
+
+A KPIDataset bundles the parsed table with everything derived from it at load
+time (period rollups, the KPI search index), so that reruns only perform
+lookups. New months are added with
+KPIDataset.append, which only recomputes the rollups they touch.
+"""
+import pandas as pd
+
+from utils.compact import concat_compact, frame_nbytes
+from utils.period_index import PeriodIndex
+from utils.rollups import affected_rollup_keys, build_rollup_cube, empty_period_frame, update_rollup_cube
+from utils.schema import check_matching_schema
+from utils.search import KPISearchIndex, filter_rows
+
+# Rows repeating these keys replace the earlier row, as when several files are combined
+ROW_KEY = ['kpi_id', 'year', 'month']
+
+
+class KPIDataset:
+    """A parsed KPI table, sorted by period, and its precomputed period rollups"""
+
+    def __init__(self, df, fingerprint, memory_report=None, load_report=None, base=None, changed_rows=None):
+        self.index = PeriodIndex(df)
+        self.df = self.index.frame
+        self.fingerprint = fingerprint
+        self.memory_report = memory_report or {}
+        self.load_report = load_report or {}
+        if base is None:
+            self.updated_rollups = None
+            self.cube = build_rollup_cube(self.df, self.index)
+        else:
+            # Extension of base: only the periods of changed_rows are re-aggregated
+            self.updated_rollups = affected_rollup_keys(changed_rows)
+            self.cube = update_rollup_cube(base.cube, self.df, self.index, self.updated_rollups)
+        self.kpi_index = KPISearchIndex.from_frame(self.df)
+
+    def period_data(self, period_type, year, period=None, departments=None, kpi_names=None):
+        """Rows for one period: exact rows for months, aggregates otherwise; optionally only some KPIs"""
+        if period_type == "annually":
+            period = None
+        frame = self.cube.get((period_type, year, period))
+        return empty_period_frame() if frame is None else filter_rows(frame, departments, kpi_names)
+
+    def period_keys(self):
+        """Keys of every period with rows: (period_type, year, period)"""
+        return self.cube.keys()
+
+    def year_rows(self, first_year, last_year, departments=None, kpi_names=None):
+        """Rows of the years first_year through last_year, optionally only of some KPIs"""
+        bounds = [self.index.year_offsets[year] for year in range(first_year, last_year + 1)
+                  if year in self.index.year_offsets]
+        if not bounds:
+            return self.df.iloc[0:0]
+        return filter_rows(self.df.iloc[bounds[0][0]:bounds[-1][1]], departments, kpi_names)
+
+    def append(self, delta, fingerprint, memory_report=None, load_report=None):
+        """
+        New dataset with the compact table delta added; this dataset is not modified.
+
+        delta must have the table's columns and column types. Its rows replace
+        existing rows with the same (kpi_id, year, month), and the result is the
+        same as loading the original workbooks followed by the delta workbook.
+        """
+        check_matching_schema(self.df, delta)
+        combined = concat_compact([self.df, delta[list(self.df.columns)]])
+        duplicated = combined.duplicated(subset=ROW_KEY, keep='last')
+        changed_rows = pd.concat([delta, combined[duplicated]], ignore_index=True)
+        if duplicated.any():
+            combined = combined[~duplicated].reset_index(drop=True)
+        return KPIDataset(combined, fingerprint, memory_report, load_report, base=self, changed_rows=changed_rows)
+
+    def __len__(self):
+        return len(self.df)
+
+    def nbytes(self):
+        """Approximate memory held by the table and its rollups"""
+        # Monthly cube entries are slices of self.df and are not counted twice
+        return frame_nbytes(self.df) + sum(
+            frame_nbytes(frame) for key, frame in self.cube.items() if key[0] != "monthly"
+        )
@@ -0,0 +1,105 @@
+"""
+Per-stage timing spans for the dashboard's diagnostics panel.
+
+Each rerun creates a StageTimer and wraps its stages (ingestion, period
+lookups, rendering, export builds) in spans:
+
+    with timer.span("aggregation") as span:
+        data = dataset.period_data(...)
+        span.frame(data)
+
+When the panel is off, span() returns a shared do-nothing object, so the
+instrumented code pays one attribute check per stage and no timing or
+memory measurement happens. When it is on, the spans are listed in the
+sidebar and, if KPI_DIAGNOSTICS_LOG is set, appended to that file as JSON
+lines.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from utils.compact import frame_nbytes
+
+# JSON-lines file that enabled diagnostics are appended to (unset: no log)
+DIAGNOSTICS_LOG = os.environ.get("KPI_DIAGNOSTICS_LOG") or None
+
+
+class _NullSpan:
+    """Stand-in span used when diagnostics are off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def frame(self, df):
+        pass
+
+    def note(self, detail):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, timer, stage, detail):
+        self.timer = timer
+        self.record = {'stage': stage, 'seconds': None, 'rows': None, 'bytes': None, 'detail': detail}
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.record['seconds'] = time.perf_counter() - self._start
+        self.timer.add(**self.record)
+        return False
+
+    def frame(self, df):
+        """Record the row count and in-memory size of the stage's result"""
+        self.record['rows'] = len(df)
+        self.record['bytes'] = frame_nbytes(df)
+
+    def note(self, detail):
+        self.record['detail'] = detail
+
+
+class StageTimer:
+    """Timing spans of one rerun"""
+
+    def __init__(self, enabled=False, log_path=DIAGNOSTICS_LOG):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.run_id = uuid.uuid4().hex[:12]
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def span(self, stage, detail=None):
+        """Context manager timing one stage; a no-op when diagnostics are off"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, detail)
+
+    def add(self, stage, seconds, rows=None, bytes=None, detail=None):
+        """Record a stage measured elsewhere (e.g. an export built on a worker thread)"""
+        if not self.enabled:
+            return
+        record = {'stage': stage, 'seconds': seconds, 'rows': rows, 'bytes': bytes, 'detail': detail}
+        with self._lock:
+            self.spans.append(record)
+        if self.log_path:
+            self._write([record])
+
+    def total_seconds(self):
+        return sum(record['seconds'] for record in self.spans)
+
+    def _write(self, records):
+        timestamp = datetime.now().isoformat(timespec='milliseconds')
+        lines = "".join(json.dumps({'time': timestamp, 'run': self.run_id, **record}) + "\n" for record in records)
+        with self._lock, open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
@@ -0,0 +1,89 @@
+"""
+Streaming reader for very large KPI workbooks.
+
+pd.read_excel materialises the whole sheet as Python objects before building
+the DataFrame, so peak memory is several times the final table. This reader
+walks the sheet with openpyxl's read-only mode, turns every `chunk_rows` rows
+into a compact DataFrame straight away and only keeps the compact chunks, so
+peak memory stays close to the size of the finished table. Text cells that
+pd.read_excel treats as missing ("n/a", "NA", "" and so on) are made missing
+here as well, so a workbook gives the same table whichever reader it takes.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils.compact import VALUE_DTYPE, compact_kpi_frame, concat_compact, frame_nbytes
+from utils.schema import MissingColumnsError
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Text cells pd.read_excel reads as missing by default (its na_values)
+NA_STRINGS = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+              "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+
+
+def is_xlsx(data):
+    """xlsx workbooks are zip archives; legacy .xls files are not"""
+    return data[:4] == b"PK\x03\x04"
+
+
+def _chunk_frame(rows, columns):
+    """DataFrame of raw sheet rows, with pandas' default missing-value strings as NaN"""
+    chunk = pd.DataFrame.from_records(rows, columns=columns)
+    text_columns = [col for col in chunk.columns
+                    if pd.api.types.is_object_dtype(chunk[col].dtype) or pd.api.types.is_string_dtype(chunk[col].dtype)]
+    if text_columns:
+        chunk[text_columns] = chunk[text_columns].replace(NA_STRINGS, np.nan)
+    return chunk
+
+
+def iter_sheet_chunks(data, required_columns, chunk_rows=DEFAULT_CHUNK_ROWS, sheet_name=None):
+    """Yield DataFrames of at most chunk_rows rows from one sheet (the first by default)"""
+    # Imported on first upload rather than at app start
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+        # Some exporters write wrong sheet dimensions; read to the real end instead
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+
+        header = next(rows, None) or ()
+        columns = [col for col in header]
+        if not all(col in columns for col in required_columns):
+            raise MissingColumnsError([col for col in columns if col is not None])
+
+        buffer = []
+        chunks_yielded = 0
+        for row in rows:
+            if all(cell is None for cell in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield _chunk_frame(buffer, columns)
+                chunks_yielded += 1
+                buffer = []
+        # A sheet with only a header still yields one (empty) chunk
+        if buffer or not chunks_yielded:
+            yield _chunk_frame(buffer, columns)
+    finally:
+        workbook.close()
+
+
+def read_workbook_streaming(data, required_columns, chunk_rows=DEFAULT_CHUNK_ROWS, value_dtype=VALUE_DTYPE,
+                            sheet_name=None):
+    """Read a workbook sheet chunk by chunk into a compact table; returns (df, memory_report)"""
+    chunks = []
+    bytes_as_read = 0
+    for chunk in iter_sheet_chunks(data, required_columns, chunk_rows, sheet_name):
+        bytes_as_read += frame_nbytes(chunk)
+        chunks.append(compact_kpi_frame(chunk, value_dtype)[0])
+
+    # Narrow types again across chunk boundaries
+    df, memory_report = compact_kpi_frame(concat_compact(chunks), value_dtype)
+    memory_report['bytes_before'] = bytes_as_read
+    memory_report['streamed'] = True
+    return df, memory_report
@@ -0,0 +1,90 @@
+"""
+On-demand export artifacts (PDF / CSV) for reports and comparisons.
+
+Exports are only built when a user asks for a download. Builds run on a
+small background thread pool so the on-screen report is not blocked, and
+finished artifacts are kept by key - (data fingerprint, period selection,
+export type) - so a second request for the same export is served instantly.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_MAX_WORKERS = 2
+
+
+def _to_bytes(artifact):
+    """Builders may return bytes, str, an in-memory buffer or an open (temporary) file"""
+    if hasattr(artifact, 'getvalue'):
+        artifact = artifact.getvalue()
+    elif hasattr(artifact, 'read'):
+        with artifact:
+            artifact = artifact.read()
+    if isinstance(artifact, str):
+        artifact = artifact.encode('utf-8')
+    return artifact
+
+
+class ExportCache:
+    """Background export builder with a bounded LRU of finished artifacts"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_workers=DEFAULT_MAX_WORKERS):
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kpi-export")
+        self._futures = OrderedDict()  # key -> Future[bytes]
+        self._build_seconds = {}  # key -> seconds the finished build took
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0  # lookups that found the artifact already built or building
+
+    def get(self, key):
+        """The pending or finished build for key, or None if it was never requested"""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self._futures.move_to_end(key)
+                self.hits += 1
+            return future
+
+    def submit(self, key, builder, *args):
+        """Start building an artifact unless it is already built or building"""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self._futures.move_to_end(key)
+                self.hits += 1
+                return future
+            future = self._executor.submit(self._build, key, builder, args)
+            self._futures[key] = future
+            self.builds += 1
+            # Failed or evicted builds are simply rebuilt on the next request
+            while len(self._futures) > self.max_entries:
+                evicted, _ = self._futures.popitem(last=False)
+                self._build_seconds.pop(evicted, None)
+            return future
+
+    def _build(self, key, builder, args):
+        start = time.perf_counter()
+        artifact = _to_bytes(builder(*args))
+        self._build_seconds[key] = time.perf_counter() - start
+        return artifact
+
+    def build_seconds(self, key):
+        """How long the finished build for key took, or None"""
+        return self._build_seconds.get(key)
+
+    def discard(self, key):
+        with self._lock:
+            self._futures.pop(key, None)
+            self._build_seconds.pop(key, None)
+
+    def stats(self):
+        """Snapshot of export counters for display"""
+        return {
+            'builds': self.builds,
+            'hits': self.hits,
+            'entries': len(self._futures),
+            'max_entries': self.max_entries,
+        }
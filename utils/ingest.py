@@ -0,0 +1,329 @@
+"""
+Excel ingestion for the KPI dashboard.
+
+Uploaded workbooks are keyed by a hash of their bytes so that a given set of
+files is only parsed once; every later rerun (and every other session
+uploading the same files) gets the cached dataset, including its period
+rollups, back. All sheets of all files are parsed in parallel worker
+processes and combined into one table. Each parsed workbook is also written
+to a columnar sidecar file (utils/sidecar.py), so a workbook seen before is
+memory-mapped from disk instead of parsed, even after a server restart.
+
+A new month can be appended to a cached dataset: only the delta workbook is
+parsed, and only the rollups of the periods it touches are recomputed. The
+result is cached under the same key as uploading all the files at once.
+"""
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from utils.compact import compact_kpi_frame, concat_compact, frame_nbytes
+from utils.dataset import KPIDataset
+from utils.excel_stream import is_xlsx, read_workbook_streaming
+from utils.schema import REQUIRED_COLUMNS, MissingColumnsError
+from utils.sidecar import SIDECAR_DIR, read_sidecar, write_sidecar
+from utils.validation import merge_reports, usable_rows, validate_kpi_table
+
+# Default memory budget for parsed tables held by the ingestion cache
+DEFAULT_CACHE_BUDGET_BYTES = 512 * 1024 * 1024
+
+# Workbooks larger than this are read with the streaming, chunked reader
+STREAMING_THRESHOLD_BYTES = int(os.environ.get("KPI_STREAMING_THRESHOLD_MB", "20")) * 1024 * 1024
+
+# Worker processes used to parse several sheets/files at once (default: one per CPU)
+INGEST_WORKERS = int(os.environ.get("KPI_INGEST_WORKERS", "0")) or None
+
+# Below this total upload size, starting worker processes costs more than it saves
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+
+def fingerprint_bytes(data):
+    """Return the content hash used to key a workbook"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprint_files(files):
+    """Content hash of an ordered set of workbooks; a single file keeps its own hash"""
+    hashes = [fingerprint_bytes(data) for _, data in files]
+    if len(hashes) == 1:
+        return hashes[0]
+    return hashlib.sha256("\n".join(hashes).encode()).hexdigest()
+
+
+def parse_kpi_workbook(data, sheet_name=0):
+    """Parse one sheet of a workbook into a DataFrame and check the required columns"""
+    df = pd.read_excel(io.BytesIO(data), sheet_name=sheet_name)
+
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise MissingColumnsError(df.columns)
+
+    return df
+
+
+def list_sheets(data):
+    """Sheet names of a workbook, without loading any sheet data for .xlsx files"""
+    if is_xlsx(data):
+        # Imported on first upload rather than at app start
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(io.BytesIO(data), read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    return list(pd.ExcelFile(io.BytesIO(data)).sheet_names)
+
+
+def parse_sheet(file_name, data, sheet_name, streaming_threshold=STREAMING_THRESHOLD_BYTES):
+    """
+    Parse one sheet into a compact table. Runs in ingestion worker processes.
+
+    Sheets without the required columns (notes, lookups, ...) are reported
+    with df=None instead of failing the whole upload.
+    """
+    start = time.perf_counter()
+    result = {'file': file_name, 'sheet': sheet_name, 'df': None, 'memory_report': None, 'columns': None}
+    try:
+        if len(data) > streaming_threshold and is_xlsx(data):
+            df, memory_report = read_workbook_streaming(data, REQUIRED_COLUMNS, sheet_name=sheet_name)
+        else:
+            df, memory_report = compact_kpi_frame(parse_kpi_workbook(data, sheet_name))
+        result['df'], result['memory_report'] = df, memory_report
+    except MissingColumnsError as e:
+        result['columns'] = e.found_columns
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _run_parse_tasks(tasks, total_bytes, streaming_threshold, max_workers):
+    """Parse (file_name, data, sheet) tasks, in a process pool when that pays off"""
+    if len(tasks) == 1 or total_bytes < PARALLEL_MIN_BYTES or max_workers == 1:
+        return [parse_sheet(name, data, sheet, streaming_threshold) for name, data, sheet in tasks]
+
+    workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+    # spawn keeps worker start-up independent of the (multi-threaded) server process
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(parse_sheet, name, data, sheet, streaming_threshold) for name, data, sheet in tasks]
+        return [future.result() for future in futures]
+
+
+def _read_sidecars(files, sidecar_dir):
+    """Sheet results of every workbook that has a sidecar, by position in files"""
+    found = {}
+    if sidecar_dir is None:
+        return found
+    for position, (name, data) in enumerate(files):
+        start = time.perf_counter()
+        stored = read_sidecar(sidecar_dir, fingerprint_bytes(data))
+        if stored is not None:
+            df, info = stored
+            found[position] = {
+                'file': name, 'sheet': None, 'df': df, 'columns': None, 'sidecar': True,
+                'sheets': info.get('sheets', 1), 'sheet_rows': info.get('sheet_rows', [[None, len(df)]]),
+                'memory_report': {'bytes_before': info.get('bytes_before', frame_nbytes(df)), 'streamed': False},
+                'seconds': time.perf_counter() - start,
+            }
+    return found
+
+
+def _write_sidecar(sidecar_dir, data, results):
+    """Store the combined sheets of one freshly parsed workbook"""
+    parsed = [result for result in results if result['df'] is not None]
+    if sidecar_dir is None or not parsed:
+        return
+    info = {
+        'sheets': len(parsed),
+        'sheet_rows': [[result['sheet'], len(result['df'])] for result in parsed],
+        'bytes_before': sum(result['memory_report']['bytes_before'] for result in parsed),
+    }
+    write_sidecar(sidecar_dir, fingerprint_bytes(data), concat_compact([result['df'] for result in parsed]), info)
+
+
+def load_workbooks(files, streaming_threshold=STREAMING_THRESHOLD_BYTES, max_workers=INGEST_WORKERS,
+                   sidecar_dir=SIDECAR_DIR, reference=None):
+    """
+    Parse every sheet of every workbook and combine them into one compact table.
+
+    files is a list of (file_name, bytes). When several sheets are combined,
+    rows repeating a (kpi_id, year, month) are dropped, keeping the one from
+    the later file/sheet. Workbooks with a sidecar in sidecar_dir are read
+    from it instead of parsed, and new ones are stored there (None: neither).
+    Returns (df, memory_report, load_report) where load_report has per-file
+    rows, sheets, parse seconds and whether the sidecar was used, and the
+    row validation report of the combined rows (see utils/validation.py;
+    reference is the table the rows will be appended to, if any).
+    """
+    start = time.perf_counter()
+    stored = _read_sidecars(files, sidecar_dir)
+    tasks, positions = [], []
+    for position, (name, data) in enumerate(files):
+        if position not in stored:
+            sheets = list_sheets(data)
+            tasks.extend((name, data, sheet) for sheet in sheets)
+            positions.extend([position] * len(sheets))
+
+    total_bytes = sum(len(files[position][1]) for position in set(positions))
+    parse_results = _run_parse_tasks(tasks, total_bytes, streaming_threshold, max_workers) if tasks else []
+    by_file = {position: [stored[position]] for position in stored}
+    for position, result in zip(positions, parse_results):
+        by_file.setdefault(position, []).append(result)
+    for position in set(positions):
+        _write_sidecar(sidecar_dir, files[position][1], by_file[position])
+
+    # Sheet results in file order, so that later files still win on duplicates
+    results = [result for position in sorted(by_file) for result in by_file[position]]
+    parsed = [result for result in results if result['df'] is not None]
+    if not parsed:
+        raise MissingColumnsError(results[0]['columns'])
+
+    df = concat_compact([result['df'] for result in parsed])
+    sources = []
+    for result in parsed:
+        sheet_rows = result.get('sheet_rows', [[result['sheet'], len(result['df'])]])
+        sources.extend((result['file'], sheet, rows) for sheet, rows in sheet_rows)
+    validation = validate_kpi_table(df, sources, reference)
+    # Bad cells are reported above; the rollups only get numbers and rows that have a period
+    usable = usable_rows(df)
+    if usable is not df:
+        df = compact_kpi_frame(usable)[0]
+
+    duplicates = 0
+    if len(parsed) > 1:
+        duplicated = df.duplicated(subset=['kpi_id', 'year', 'month'], keep='last')
+        duplicates = int(duplicated.sum())
+        if duplicates:
+            df = df[~duplicated].reset_index(drop=True)
+
+    memory_report = {
+        'bytes_before': sum(result['memory_report']['bytes_before'] for result in parsed),
+        'bytes_after': frame_nbytes(df),
+        'streamed': any(result['memory_report'].get('streamed') for result in parsed),
+    }
+
+    per_file = {}
+    for result in results:
+        entry = per_file.setdefault(result['file'], {'file': result['file'], 'sheets': 0, 'rows': 0, 'seconds': 0.0,
+                                                     'sidecar': False})
+        entry['seconds'] += result['seconds']
+        entry['sidecar'] = entry['sidecar'] or result.get('sidecar', False)
+        if result['df'] is not None:
+            entry['sheets'] += result.get('sheets', 1)
+            entry['rows'] += len(result['df'])
+    load_report = {
+        'files': list(per_file.values()),
+        'duplicates_dropped': duplicates,
+        'wall_seconds': time.perf_counter() - start,
+        'validation': validation,
+    }
+    return df, memory_report, load_report
+
+
+class IngestionCache:
+    """Thread-safe LRU of loaded datasets, bounded by total memory size"""
+
+    def __init__(self, budget_bytes=DEFAULT_CACHE_BUDGET_BYTES, streaming_threshold=STREAMING_THRESHOLD_BYTES,
+                 max_workers=INGEST_WORKERS, sidecar_dir=SIDECAR_DIR):
+        self.budget_bytes = budget_bytes
+        self.streaming_threshold = streaming_threshold
+        self.max_workers = max_workers
+        self.sidecar_dir = sidecar_dir
+        self._entries = OrderedDict()  # fingerprint -> (dataset, nbytes)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.loads = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, files):
+        """Return (fingerprint, dataset) for a list of (file_name, bytes), parsing only on a miss"""
+        key = fingerprint_files(files)
+        with self._lock:
+            self.loads += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return key, entry[0]
+            self.misses += 1
+
+        # Parse outside the lock so other sessions are not blocked meanwhile
+        df, memory_report, load_report = load_workbooks(files, self.streaming_threshold, self.max_workers, self.sidecar_dir)
+        dataset = KPIDataset(df, key, memory_report, load_report)
+        self._store(key, dataset)
+        return key, dataset
+
+    def append(self, files, delta_files):
+        """
+        Return (fingerprint, dataset) for files followed by delta_files.
+
+        The dataset of files comes from the cache (or is loaded), only the
+        delta workbooks are parsed, and their rows are appended to it.
+        """
+        key = fingerprint_files(files + delta_files)
+        with self._lock:
+            self.loads += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return key, entry[0]
+            self.misses += 1
+
+        _, base = self.load(files)
+        start = time.perf_counter()
+        delta, delta_memory, delta_load = load_workbooks(delta_files, self.streaming_threshold, self.max_workers,
+                                                            self.sidecar_dir, reference=base.df)
+        previous_rows = len(base.df)
+        memory_report = dict(base.memory_report)
+        memory_report['bytes_before'] = memory_report.get('bytes_before', 0) + delta_memory['bytes_before']
+        memory_report['streamed'] = memory_report.get('streamed', False) or delta_memory['streamed']
+        load_report = {
+            'files': base.load_report.get('files', []) + delta_load['files'],
+            'duplicates_dropped': base.load_report.get('duplicates_dropped', 0),
+            'wall_seconds': 0.0,
+            'validation': merge_reports([report for report in (base.load_report.get('validation'),
+                                                               delta_load['validation']) if report]),
+        }
+        dataset = base.append(delta, key, memory_report, load_report)
+        dataset.memory_report['bytes_after'] = frame_nbytes(dataset.df)
+        load_report['duplicates_dropped'] += previous_rows + len(delta) - len(dataset.df)
+        load_report['wall_seconds'] = time.perf_counter() - start
+        load_report['appended'] = {'rows': len(delta), 'rollups_updated': len(dataset.updated_rollups)}
+        self._store(key, dataset)
+        return key, dataset
+
+    def _store(self, key, dataset):
+        nbytes = dataset.nbytes()
+        with self._lock:
+            if key in self._entries:
+                return
+            # A table larger than the whole budget is returned but never kept
+            if nbytes > self.budget_bytes:
+                return
+            self._entries[key] = (dataset, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.budget_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def stats(self):
+        """Snapshot of cache counters for display"""
+        with self._lock:
+            return {
+                'loads': self.loads,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'budget_bytes': self.budget_bytes,
+            }
@@ -0,0 +1,55 @@
+"""
+Per-session memo of computed report, comparison and trend results.
+
+Results are keyed by (data fingerprint, view, selection), so switching tabs
+or going back to a period viewed earlier reuses the computed frames instead
+of running the lookup/merge/pivot again. The memo is a small LRU held in the
+session state; the dataset itself stays in the shared ingestion cache, and
+results of other data are dropped when new data is loaded so the memo never
+keeps an evicted table alive.
+"""
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 32
+
+
+class ResultMemo:
+    """Bounded LRU of computed results with hit/miss counters"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        """Return (result, hit): the memoized result for key, computing and storing it on a miss"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key], True
+        self.misses += 1
+        result = compute()
+        self._entries[key] = result
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result, False
+
+    def retain(self, fingerprint):
+        """Drop the results computed from any other data"""
+        for key in [key for key in self._entries if key[0] != fingerprint]:
+            del self._entries[key]
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Snapshot of memo counters for display"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate(),
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+        }
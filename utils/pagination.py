@@ -0,0 +1,42 @@
+"""
+Department pages for the report and comparison views.
+
+Rendering every department at once makes a rerun (and the browser tab) grow
+with the dataset. The views instead show one page of departments at a time.
+A page holds up to the chosen number of departments and stops early once it
+reaches MAX_PAGE_KPIS KPIs, so a page of very large departments costs about
+as much to render as a page of small ones. A department larger than the
+budget gets a page of its own.
+"""
+
+DEPARTMENTS_PER_PAGE = [5, 10, 25, 50]
+DEFAULT_DEPARTMENTS_PER_PAGE = 10
+
+# KPI cards, chart bars and table rows rendered per page at most (unless one department has more)
+MAX_PAGE_KPIS = 500
+
+
+def department_pages(kpi_counts, departments_per_page=DEFAULT_DEPARTMENTS_PER_PAGE, max_kpis=MAX_PAGE_KPIS):
+    """
+    Split departments into pages, in order.
+
+    kpi_counts is a list of (department, number of KPIs) pairs. Returns a
+    list of pages, each a list of department names.
+    """
+    pages, page, page_kpis = [], [], 0
+    for department, count in kpi_counts:
+        if page and (len(page) >= departments_per_page or page_kpis + count > max_kpis):
+            pages.append(page)
+            page, page_kpis = [], 0
+        page.append(department)
+        page_kpis += count
+    if page:
+        pages.append(page)
+    return pages
+
+
+def department_kpi_counts(data):
+    """(department, KPI rows) pairs of a report or comparison frame, sorted by department"""
+    counts = data['department'].value_counts(sort=False)
+    counts = counts[counts > 0]
+    return sorted(zip(counts.index, counts.to_numpy().tolist()))
@@ -0,0 +1,238 @@
+"""
+PDF generators for KPI reports and period comparisons.
+
+Both generators take their styles and page template from utils.pdf_theme,
+which is built once per process.
+
+Reports with more than LARGE_REPORT_ROWS rows switch to a large-report mode:
+cell text is formatted column-wise with NumPy instead of per row with
+iterrows(), each department is emitted as a series of page-sized tables that
+each repeat the header (instead of one KeepTogether block that ReportLab has
+to split over and over), and the PDF is written to a temporary file on disk
+rather than an in-memory buffer.
+"""
+import io
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from reportlab.platypus import KeepTogether, Paragraph, Spacer, Table
+
+from utils.pdf_theme import COMPARISON_COL_WIDTHS, REPORT_COL_WIDTHS, get_theme, new_document
+
+LARGE_REPORT_ROWS = 1000
+
+# Data rows per table in large-report mode; about one A4 page at the theme's row heights
+REPORT_ROWS_PER_TABLE = 20
+COMPARISON_ROWS_PER_TABLE = 24
+
+
+def _format_column(values, spec):
+    """printf-style formatting of a whole numeric column at once"""
+    return np.char.mod(spec, np.asarray(values, dtype=float))
+
+
+def _format_change(change_percent):
+    change = np.asarray(change_percent, dtype=float)
+    return np.where(np.isnan(change), "N/A", np.char.mod("%+.1f%%", change))
+
+
+def _chunked_tables(header, rows, col_widths, table_style, rows_per_table):
+    """Split table rows into page-sized tables that each start with the header row"""
+    tables = []
+    for start in range(0, len(rows), rows_per_table):
+        table = Table([header] + rows[start:start + rows_per_table], colWidths=col_widths, repeatRows=1)
+        table.setStyle(table_style)
+        tables.append(table)
+    return tables
+
+
+def _build_large_document(elements, dept_sections):
+    """
+    Lay out department sections without KeepTogether and write the PDF to a
+    temporary file, returning it open and rewound.
+    """
+    for i, (dept_header, tables) in enumerate(dept_sections):
+        # Keep the banner with the first chunk; later chunks flow freely
+        elements.append(KeepTogether([dept_header, Spacer(1, 10), tables[0]]))
+        elements.extend(tables[1:])
+        if i < len(dept_sections) - 1:
+            elements.append(Spacer(1, 25))
+
+    output = tempfile.TemporaryFile(suffix=".pdf")
+    new_document(output).build(elements)
+    output.seek(0)
+    return output
+
+
+def _large_pdf_report(filtered_data, elements, theme):
+    dept_sections = []
+    for dept, dept_data in filtered_data.groupby('department', sort=True, observed=True):
+        rows = np.column_stack((
+            dept_data['kpi_name'].astype(str).to_numpy(),
+            _format_column(dept_data['value'], "%.2f"),
+        )).tolist()
+        tables = _chunked_tables(['KPI Name', 'Value'], rows, REPORT_COL_WIDTHS,
+                                 theme.report_table, REPORT_ROWS_PER_TABLE)
+        dept_sections.append((Paragraph(f"{dept} Department", theme.dept_header), tables))
+    return _build_large_document(elements, dept_sections)
+
+
+def _large_comparison_pdf(comparison_data, elements, theme, period_1_name, period_2_name):
+    dept_sections = []
+    header = ['KPI Name', period_1_name, period_2_name, 'Change %']
+    for dept, dept_data in comparison_data.groupby('department', sort=True, observed=True):
+        rows = np.column_stack((
+            dept_data['kpi_name'].astype(str).to_numpy(),
+            _format_column(dept_data['period_1_value'], "%.2f"),
+            _format_column(dept_data['period_2_value'], "%.2f"),
+            _format_change(dept_data['change_percent']),
+        )).tolist()
+        tables = _chunked_tables(header, rows, COMPARISON_COL_WIDTHS,
+                                 theme.comparison_table, COMPARISON_ROWS_PER_TABLE)
+        dept_sections.append((Paragraph(f"{dept} Department", theme.comparison_dept_header), tables))
+    return _build_large_document(elements, dept_sections)
+
+
+def create_pdf_report(filtered_data, period_name, value_type, large=None):
+    """
+    Generate a high-quality PDF report with proper page breaks.
+
+    Returns a binary file object positioned at the start. large=None picks
+    the large-report mode automatically from the row count.
+    """
+    if large is None:
+        large = len(filtered_data) > LARGE_REPORT_ROWS
+    theme = get_theme()
+    
+    # Container for the 'Flowable' objects
+    elements = []
+    
+    # Add title and header
+    title = Paragraph("KPI Dashboard Report", theme.title)
+    elements.append(title)
+    
+    # Add subtitle with period info
+    subtitle_text = f"{period_name}<br/><font color='#888888' size='11'>{value_type} | Generated: {datetime.now().strftime('%B %d, %Y at %H:%M')}</font>"
+    subtitle = Paragraph(subtitle_text, theme.subtitle)
+    elements.append(subtitle)
+    
+    if large:
+        return _large_pdf_report(filtered_data, elements, theme)
+    
+    buffer = io.BytesIO()
+    doc = new_document(buffer)
+    
+    # Group by department
+    departments = filtered_data['department'].unique()
+    
+    for i, dept in enumerate(sorted(departments)):
+        dept_data = filtered_data[filtered_data['department'] == dept]
+        
+        # Create department section elements
+        dept_elements = []
+        
+        # Department header
+        dept_header = Paragraph(f"{dept} Department", theme.dept_header)
+        dept_elements.append(dept_header)
+        dept_elements.append(Spacer(1, 10))
+        
+        # Create table data for this department
+        table_data = [['KPI Name', 'Value']]  # Header row
+        
+        for _, row in dept_data.iterrows():
+            table_data.append([row['kpi_name'], f"{row['value']:.2f}"])
+        
+        # Create table with the shared report table style
+        table = Table(table_data, colWidths=REPORT_COL_WIDTHS, repeatRows=1)
+        table.setStyle(theme.report_table)
+        
+        dept_elements.append(table)
+        
+        # Keep department header and table together
+        dept_section = KeepTogether(dept_elements)
+        elements.append(dept_section)
+        
+        # Add space between departments (but not after the last one)
+        if i < len(departments) - 1:
+            elements.append(Spacer(1, 25))
+    
+    # Build PDF
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
+
+
+def create_comparison_pdf(comparison_data, period_1_name, period_2_name, large=None):
+    """
+    Generate a high-quality PDF comparison report.
+
+    Returns a binary file object positioned at the start. large=None picks
+    the large-report mode automatically from the row count.
+    """
+    if large is None:
+        large = len(comparison_data) > LARGE_REPORT_ROWS
+    theme = get_theme()
+    
+    elements = []
+    
+    # Add title and header
+    title = Paragraph("KPI Comparison Report", theme.title)
+    elements.append(title)
+    
+    subtitle_text = f"{period_1_name} vs {period_2_name}<br/><font color='#888888' size='11'>Generated: {datetime.now().strftime('%B %d, %Y at %H:%M')}</font>"
+    subtitle = Paragraph(subtitle_text, theme.subtitle)
+    elements.append(subtitle)
+    
+    if large:
+        return _large_comparison_pdf(comparison_data, elements, theme, period_1_name, period_2_name)
+    
+    buffer = io.BytesIO()
+    doc = new_document(buffer)
+    
+    # Group by department
+    departments = comparison_data['department'].unique()
+    
+    for i, dept in enumerate(sorted(departments)):
+        dept_data = comparison_data[comparison_data['department'] == dept]
+        
+        # Create department section elements
+        dept_elements = []
+        
+        # Department header
+        dept_header = Paragraph(f"{dept} Department", theme.comparison_dept_header)
+        dept_elements.append(dept_header)
+        dept_elements.append(Spacer(1, 10))
+        
+        # Create comparison table
+        table_data = [['KPI Name', period_1_name, period_2_name, 'Change %']]
+        
+        for _, row in dept_data.iterrows():
+            change_pct = row['change_percent']
+            change_text = f"{change_pct:+.1f}%" if pd.notna(change_pct) else "N/A"
+            table_data.append([
+                row['kpi_name'], 
+                f"{row['period_1_value']:.2f}",
+                f"{row['period_2_value']:.2f}", 
+                change_text
+            ])
+        
+        # Create table with the shared comparison table style
+        table = Table(table_data, colWidths=COMPARISON_COL_WIDTHS, repeatRows=1)
+        table.setStyle(theme.comparison_table)
+        
+        dept_elements.append(table)
+        
+        # Keep department section together
+        dept_section = KeepTogether(dept_elements)
+        elements.append(dept_section)
+        
+        # Add space between departments
+        if i < len(departments) - 1:
+            elements.append(Spacer(1, 25))
+    
+    # Build PDF
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,126 @@
+"""
+Shared look of the dashboard's PDF exports.
+
+Paragraph styles, table styles and the page template are built once per
+process and reused by every PDF generator, instead of calling
+getSampleStyleSheet() and rebuilding the same styles for each department of
+each export. The objects are never mutated after construction, so they are
+safe to share between export threads.
+"""
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, TableStyle
+
+ACCENT = colors.HexColor('#00D4AA')
+ACCENT_LIGHT = colors.HexColor('#E6FFFA')
+MUTED = colors.HexColor('#666666')
+GRID = colors.HexColor('#DDDDDD')
+ROW_ALT = colors.HexColor('#F8FAFC')
+
+PAGE_MARGINS = {'rightMargin': 40, 'leftMargin': 40, 'topMargin': 50, 'bottomMargin': 50}
+
+REPORT_COL_WIDTHS = [4 * inch, 1.5 * inch]
+COMPARISON_COL_WIDTHS = [2.2 * inch, 1.2 * inch, 1.2 * inch, 1 * inch]
+
+
+def _table_style(header_font_size, body_font_size, padding, header_padding=None, value_columns_from=1,
+                 value_columns_to=1):
+    commands = [
+        # Header styling
+        ('BACKGROUND', (0, 0), (-1, 0), ACCENT),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (value_columns_from, 0), (value_columns_to, -1), 'RIGHT'),  # Right align values
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), header_font_size),
+
+        # Data rows styling
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), body_font_size),
+        ('GRID', (0, 0), (-1, -1), 1, GRID),
+
+        # Alternating row colors
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, ROW_ALT]),
+
+        # Padding
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), padding[0]),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), padding[0]),
+        ('LEFTPADDING', (0, 0), (-1, -1), padding[1]),
+        ('RIGHTPADDING', (0, 0), (-1, -1), padding[1]),
+    ]
+    if header_padding is not None:
+        # Header specific styling
+        commands += [
+            ('TOPPADDING', (0, 0), (-1, 0), header_padding),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), header_padding),
+        ]
+    return TableStyle(commands)
+
+
+class PDFTheme:
+    """Styles shared by all PDF generators"""
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.title = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=22,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            textColor=ACCENT,
+            fontName='Helvetica-Bold'
+        )
+
+        self.subtitle = ParagraphStyle(
+            'CustomSubtitle',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=MUTED
+        )
+
+        self.dept_header = ParagraphStyle(
+            'DeptHeader',
+            parent=styles['Heading2'],
+            fontSize=16,
+            spaceAfter=8,
+            spaceBefore=15,
+            textColor=ACCENT,
+            fontName='Helvetica-Bold',
+            alignment=TA_CENTER,
+            backColor=ACCENT_LIGHT,
+            borderWidth=2,
+            borderColor=ACCENT,
+            borderPadding=10,
+            borderRadius=5
+        )
+
+        # Comparison reports use square department banners
+        self.comparison_dept_header = ParagraphStyle(
+            'ComparisonDeptHeader',
+            parent=self.dept_header,
+            borderRadius=None
+        )
+
+        self.report_table = _table_style(12, 10, (10, 15), header_padding=12)
+        self.comparison_table = _table_style(11, 9, (8, 10), value_columns_to=-1)
+
+
+@lru_cache(maxsize=None)
+def get_theme():
+    """The process-wide PDF theme, built on first use"""
+    return PDFTheme()
+
+
+def new_document(target):
+    """A4 document with the dashboard's standard margins, writing to a path or buffer"""
+    return SimpleDocTemplate(target, pagesize=A4, **PAGE_MARGINS)
@@ -0,0 +1,67 @@
+"""
+Sorted (year, month) index over the KPI table.
+
+The table is sorted once by year and month (stable, so rows keep their
+original order within a month) and the start/stop offsets of every year and
+every month are recorded. A month's rows (and a run of years) are then a
+contiguous iloc range, and the year/month/quarter choices for the period
+selectors are precomputed. Quarters, halves and years are aggregated by the
+rollup cube from the quarter and year columns, not sliced here.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _run_offsets(keys):
+    """Start/stop offsets of each run of equal values in a sorted key array"""
+    if len(keys) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    breaks = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    starts = np.concatenate(([0], breaks))
+    stops = np.concatenate((breaks, [len(keys)]))
+    return starts, stops
+
+
+class PeriodIndex:
+    """Offsets of every year and (year, month) in a table sorted by period"""
+
+    def __init__(self, df):
+        # Non-numeric periods sort first under -1 and never show up as choices
+        years = pd.to_numeric(df['year'], errors='coerce').fillna(-1).to_numpy(np.int64)
+        months = pd.to_numeric(df['month'], errors='coerce').fillna(-1).to_numpy(np.int64)
+
+        order = np.lexsort((months, years))
+        if (order != np.arange(len(order))).any():
+            df = df.iloc[order]
+            years, months = years[order], months[order]
+        self.frame = df
+
+        self.year_offsets = {}
+        for start, stop in zip(*_run_offsets(years)):
+            self.year_offsets[years[start].item()] = (int(start), int(stop))
+
+        self.month_offsets = {}
+        for start, stop in zip(*_run_offsets(years * 100 + months)):
+            self.month_offsets[(years[start].item(), months[start].item())] = (int(start), int(stop))
+
+        # Selector metadata
+        self.years = sorted(year for year in self.year_offsets if year >= 0)
+        self.months_by_year = {year: [] for year in self.years}
+        for year, month in self.month_offsets:
+            if year >= 0 and 1 <= month <= 12:
+                self.months_by_year[year].append(month)
+        self.quarters_by_year = {}
+        for year in self.years:
+            start, stop = self.year_offsets[year]
+            quarters = pd.to_numeric(df['quarter'].iloc[start:stop], errors='coerce').dropna().unique()
+            self.quarters_by_year[year] = sorted(int(q) for q in quarters)
+
+    def months(self, year):
+        return self.months_by_year.get(year, [])
+
+    def quarters(self, year):
+        return self.quarters_by_year.get(year, [])
+
+    def month_slice(self, year, month):
+        start, stop = self.month_offsets.get((year, month), (0, 0))
+        return self.frame.iloc[start:stop]
@@ -0,0 +1,121 @@
+"""
+Period rollup cube for the KPI dashboard.
+
+Every report and comparison side is one (period_type, year, period) lookup
+into a cube that is built once, right after a workbook is ingested:
+
+    monthly      -> the raw rows for that month (exact values)
+    quarterly    -> one row per department/KPI for the quarter
+    half_annual  -> one row per department/KPI for months 1-6 or 7-12
+    annually     -> one row per department/KPI for the year
+
+Aggregated periods average percentages and sum numbers.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.aggregation import AGGREGATE_COLUMNS, aggregate_by_data_type
+
+PERIOD_TYPES = ["monthly", "quarterly", "half_annual", "annually"]
+
+MONTH_NAMES = {1: 'January', 2: 'February', 3: 'March', 4: 'April',
+               5: 'May', 6: 'June', 7: 'July', 8: 'August',
+               9: 'September', 10: 'October', 11: 'November', 12: 'December'}
+
+
+def period_name(period_type, year, period):
+    """Human readable label for a period, as shown in report headers"""
+    if period_type == "monthly":
+        return f"{MONTH_NAMES[period]} {year}"
+    elif period_type == "quarterly":
+        return f"Q{period} {year}"
+    elif period_type == "half_annual":
+        return f"{'First' if period == 1 else 'Second'} Half {year}"
+    return f"Year {year}"
+
+
+def value_type_label(period_type):
+    """Caption describing how the values of a period type are computed"""
+    if period_type == "monthly":
+        return "Exact values"
+    return "Calculated values (avg for %, sum for numbers)"
+
+
+def _split(stats, period_type, period_col):
+    """Split an aggregated frame into one cube entry per (year, period)"""
+    entries = {}
+    group_keys = ['year'] if period_col is None else ['year', period_col]
+    for key, group in stats.groupby(group_keys, sort=True):
+        year = key[0]
+        period = None if period_col is None else key[1]
+        entries[(period_type, year, period)] = group[AGGREGATE_COLUMNS].reset_index(drop=True)
+    return entries
+
+
+def _with_half(df):
+    """Rows of valid months with their half-year (1 for months 1-6, 2 for 7-12)"""
+    # Half-years only cover valid months, matching the 1-6 / 7-12 filters
+    month = df['month']
+    half = pd.Series(np.select([month.between(1, 6), month.between(7, 12)], [1, 2], 0), index=df.index)
+    return df.assign(half=half)[half > 0]
+
+
+def _monthly_entries(index):
+    """Monthly reports show the exact rows for the month: contiguous slices of the sorted table"""
+    # Months outside 1-12 are reported by validation and have no monthly report (nor a month name)
+    return {("monthly", year, month): index.month_slice(year, month)
+            for year, month in index.month_offsets if 1 <= month <= 12}
+
+
+def build_rollup_cube(df, index):
+    """Compute every month, quarter, half and year rollup in one pass over a period-sorted table"""
+    cube = _monthly_entries(index)
+    cube.update(_split(aggregate_by_data_type(df, ['year', 'quarter']), "quarterly", 'quarter'))
+    cube.update(_split(aggregate_by_data_type(_with_half(df), ['year', 'half']), "half_annual", 'half'))
+    cube.update(_split(aggregate_by_data_type(df, ['year']), "annually", None))
+    return cube
+
+
+def affected_rollup_keys(rows):
+    """Cube keys of the quarters, halves and years that the given rows fall into"""
+    keys = {("quarterly", year, quarter) for year, quarter in zip(rows['year'], rows['quarter'])}
+    halves = _with_half(rows)
+    keys.update(("half_annual", year, half) for year, half in zip(halves['year'], halves['half']))
+    keys.update(("annually", year, None) for year in rows['year'])
+    return keys
+
+
+def _rows_in(df, period_cols, periods):
+    """Rows whose values in period_cols form one of the given tuples"""
+    if not periods:
+        return df.iloc[0:0]
+    mask = pd.MultiIndex.from_arrays([df[col] for col in period_cols]).isin(list(periods))
+    return df[mask]
+
+
+def update_rollup_cube(cube, df, index, affected):
+    """
+    Rollup cube of a changed table, recomputing only the affected keys.
+
+    cube is the cube of the table before the change and is left as is;
+    affected are the keys of the changed rows (see affected_rollup_keys).
+    Aggregates of untouched quarters, halves and years are reused, monthly
+    slices are re-taken from the new table, and every affected aggregate is
+    computed exactly as build_rollup_cube would.
+    """
+    updated = _monthly_entries(index)
+    updated.update((key, frame) for key, frame in cube.items() if key[0] != "monthly" and key not in affected)
+
+    quarters = {(year, quarter) for period_type, year, quarter in affected if period_type == "quarterly"}
+    halves = {(year, half) for period_type, year, half in affected if period_type == "half_annual"}
+    years = {(year,) for period_type, year, _ in affected if period_type == "annually"}
+    updated.update(_split(aggregate_by_data_type(_rows_in(df, ['year', 'quarter'], quarters), ['year', 'quarter']),
+                          "quarterly", 'quarter'))
+    updated.update(_split(aggregate_by_data_type(_rows_in(_with_half(df), ['year', 'half'], halves), ['year', 'half']),
+                          "half_annual", 'half'))
+    updated.update(_split(aggregate_by_data_type(_rows_in(df, ['year'], years), ['year']), "annually", None))
+    return updated
+
+
+def empty_period_frame():
+    return pd.DataFrame(columns=AGGREGATE_COLUMNS)
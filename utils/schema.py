@@ -0,0 +1,48 @@
+"""Column schema of the KPI workbook."""
+
+REQUIRED_COLUMNS = ['kpi_id', 'kpi_name', 'department', 'month', 'quarter', 'year', 'value', 'data_type']
+
+
+class MissingColumnsError(ValueError):
+    """Raised when an uploaded workbook lacks one of the required columns"""
+
+    def __init__(self, found_columns):
+        self.found_columns = list(found_columns)
+        super().__init__(f"Missing required columns. Found: {self.found_columns}")
+
+
+class SchemaMismatchError(ValueError):
+    """Raised when rows appended to a table do not have the table's columns and types"""
+
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("Appended data does not match the loaded table: " + "; ".join(self.problems))
+
+
+def _type_family(dtype):
+    # An empty cell turns an integer column into floats; pd.concat widens the other side to match
+    if dtype.kind in "iuf":
+        return "number"
+    if dtype.kind == "b":
+        return "boolean"
+    if dtype.name == "category":
+        return "category"
+    return "text"
+
+
+def check_matching_schema(table, delta):
+    """Raise SchemaMismatchError unless delta has the same columns as table, with compatible types"""
+    problems = []
+    missing = [col for col in table.columns if col not in delta.columns]
+    extra = [col for col in delta.columns if col not in table.columns]
+    if missing:
+        problems.append(f"missing columns {missing}")
+    if extra:
+        problems.append(f"unexpected columns {extra}")
+    for col in table.columns:
+        if col in delta.columns:
+            expected, found = _type_family(table[col].dtype), _type_family(delta[col].dtype)
+            if expected != found:
+                problems.append(f"column '{col}' holds {found} values, expected {expected}")
+    if problems:
+        raise SchemaMismatchError(problems)
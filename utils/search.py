@@ -0,0 +1,117 @@
+"""
+Department / KPI filters and KPI name search.
+
+A KPISearchIndex is built once per dataset, when it is loaded, from the
+distinct (department, kpi_name) pairs: the sorted KPI names, the names of
+each department, and an inverted index from every lowercase character
+trigram to the names containing it. A substring search intersects the
+posting lists of the query's trigrams and only checks the few remaining
+candidates, so it stays interactive with tens of thousands of KPI names.
+
+A filter is resolved to a department set and/or a KPI name set, which the
+datasets apply to the rows before anything is aggregated or rendered.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# Selected departments, selected KPI names and name search text; hashable, so it can be part of a cache key
+KPIFilter = namedtuple("KPIFilter", ["departments", "kpi_names", "query"])
+
+TRIGRAM = 3
+
+# KPI names offered in the selection list at most; the search narrows longer lists
+MAX_KPI_OPTIONS = 1000
+
+
+def _trigrams(text):
+    return {text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+class KPISearchIndex:
+    """Name lists and a trigram index over the KPIs of one dataset"""
+
+    def __init__(self, departments, kpi_names):
+        # departments/kpi_names: the distinct (department, kpi_name) pairs, as two parallel sequences
+        pairs = sorted({(str(dept), str(name)) for dept, name in zip(departments, kpi_names)})
+        self.names = sorted({name for _, name in pairs})
+        self.departments = sorted({dept for dept, _ in pairs})
+        name_ids = {name: i for i, name in enumerate(self.names)}
+
+        by_department = {}
+        for dept, name in pairs:
+            by_department.setdefault(dept, []).append(name_ids[name])
+        self._by_department = {dept: np.array(ids, dtype=np.int64) for dept, ids in by_department.items()}
+
+        self._lower = [name.lower() for name in self.names]
+        postings = {}
+        for i, name in enumerate(self._lower):
+            for trigram in _trigrams(name):
+                postings.setdefault(trigram, []).append(i)
+        # Names are visited in order, so every posting list is already sorted
+        self._postings = {trigram: np.array(ids, dtype=np.int64) for trigram, ids in postings.items()}
+
+    @classmethod
+    def from_frame(cls, df):
+        pairs = df[['department', 'kpi_name']].dropna().drop_duplicates()
+        return cls(pairs['department'].tolist(), pairs['kpi_name'].tolist())
+
+    def _department_ids(self, departments):
+        ids = [self._by_department[dept] for dept in departments if dept in self._by_department]
+        return np.unique(np.concatenate(ids)) if ids else np.array([], dtype=np.int64)
+
+    def search(self, query, candidates=None):
+        """Ids of the names containing query (case-insensitive), optionally among candidate ids"""
+        query = query.strip().lower()
+        if len(query) >= TRIGRAM:
+            postings = [self._postings.get(trigram) for trigram in _trigrams(query)]
+            if any(posting is None for posting in postings):
+                return np.array([], dtype=np.int64)
+            ids = postings[0]
+            for posting in sorted(postings[1:], key=len):
+                ids = np.intersect1d(ids, posting, assume_unique=True)
+            if candidates is not None:
+                ids = np.intersect1d(ids, candidates, assume_unique=True)
+        elif candidates is not None:
+            ids = candidates
+        else:
+            # Too short for a trigram: a plain scan
+            return np.array([i for i, name in enumerate(self._lower) if query in name], dtype=np.int64)
+        # Trigrams can match out of order, so every candidate is checked
+        lower = self._lower
+        return np.array([i for i in ids.tolist() if query in lower[i]], dtype=np.int64)
+
+    def kpi_options(self, departments=(), query=""):
+        """KPI names of the given departments (all if none) that contain query"""
+        candidates = self._department_ids(departments) if departments else None
+        if not query.strip():
+            ids = candidates if candidates is not None else range(len(self.names))
+        else:
+            ids = self.search(query, candidates)
+        return [self.names[i] for i in ids]
+
+    def resolve(self, kpi_filter):
+        """
+        (departments, kpi_names) to keep for a KPIFilter; None means no restriction.
+
+        Selected KPI names take precedence over the search text, which only
+        narrows the list of names to pick from. Without selected names, the
+        search text selects every name it matches.
+        """
+        departments = list(kpi_filter.departments) or None
+        kpi_names = list(kpi_filter.kpi_names) or None
+        if kpi_names is None and kpi_filter.query.strip():
+            kpi_names = self.kpi_options(kpi_filter.departments, kpi_filter.query)
+        return departments, kpi_names
+
+
+def filter_rows(df, departments=None, kpi_names=None):
+    """Rows of df in the given departments and with the given KPI names (None: any)"""
+    if departments is None and kpi_names is None:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    if departments is not None:
+        mask &= df['department'].isin(departments).to_numpy()
+    if kpi_names is not None:
+        mask &= df['kpi_name'].isin(kpi_names).to_numpy()
+    return df[mask]
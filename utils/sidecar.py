@@ -0,0 +1,91 @@
+"""
+Columnar on-disk copies of parsed workbooks.
+
+Parsing .xlsx is by far the slowest way to get the KPI table into pandas,
+and the same workbooks are uploaded day after day. After a workbook has been
+parsed, its compact table is written to an Arrow IPC file named after the
+workbook's content hash. Later loads of the same bytes, from any session or
+server process, memory-map that file instead of parsing the workbook again.
+
+Files are written to a temporary name and renamed into place, so a reader
+never sees a partial file. An unreadable or unwritable sidecar is treated as
+a miss; the workbook is then parsed as usual. So is a sidecar written with
+another SIDECAR_FORMAT_VERSION, which the next load then replaces.
+"""
+import json
+import os
+import tempfile
+
+# Directory of the sidecar files (KPI_SIDECAR_DIR="" turns them off)
+SIDECAR_DIR = os.environ.get("KPI_SIDECAR_DIR", ".kpi_sidecars") or None
+
+SIDECAR_SUFFIX = ".arrow"
+
+# Schema metadata key holding the parse details shown in the sidebar
+_INFO_KEY = b"kpi_sidecar"
+
+# Bump whenever parsing changes what table a workbook gives, so that older sidecars are no longer served
+SIDECAR_FORMAT_VERSION = 2
+_VERSION_KEY = b"kpi_sidecar_version"
+
+
+def sidecar_path(directory, fingerprint):
+    return os.path.join(directory, fingerprint + SIDECAR_SUFFIX)
+
+
+def write_sidecar(directory, fingerprint, df, info=None):
+    """
+    Store a parsed workbook's table under its content hash; returns the path or None.
+
+    info (sheets, bytes as read, ...) is kept in the file's metadata. Tables
+    Arrow cannot represent (e.g. a column mixing numbers and text) are not
+    stored.
+    """
+    # Imported on first upload rather than at app start
+    import pyarrow as pa
+
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, ValueError, TypeError):
+        return None
+    metadata = dict(table.schema.metadata or {})
+    metadata[_INFO_KEY] = json.dumps(info or {}).encode()
+    metadata[_VERSION_KEY] = str(SIDECAR_FORMAT_VERSION).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    path = sidecar_path(directory, fingerprint)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            # Uncompressed, so that reads can map the buffers straight from the page cache
+            with os.fdopen(fd, 'wb') as f, pa.ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        return None
+    return path
+
+
+def read_sidecar(directory, fingerprint):
+    """(df, info) of a stored workbook, or None when there is no usable sidecar"""
+    path = sidecar_path(directory, fingerprint)
+    if not os.path.exists(path):
+        return None
+
+    import pyarrow as pa
+
+    try:
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            if (reader.schema.metadata or {}).get(_VERSION_KEY) != str(SIDECAR_FORMAT_VERSION).encode():
+                return None
+            table = reader.read_all()
+            df = table.to_pandas()
+    except (OSError, pa.ArrowException):
+        return None
+    info = json.loads((table.schema.metadata or {}).get(_INFO_KEY, b"{}"))
+    return df, info
@@ -0,0 +1,289 @@
+"""
+Optional SQLite store of ingested KPI tables.
+
+With KPI_SQLITE_PATH set, every loaded dataset is also written to a local
+SQLite database, keyed by the same content fingerprint as the ingestion
+cache. Later sessions (and the server after a restart) open the stored
+dataset instead of loading the whole table into pandas: each report or
+comparison side is one indexed query that filters the period and averages
+percentages / sums numbers in SQL, so only that period's rows are read.
+
+    kpi_rows   one row per KPI value, with its position in the period-sorted
+               table (seq) so monthly reports keep the row order
+    datasets   fingerprint, row count, (year, month, quarter) choices and
+               load reports of complete datasets
+
+A dataset is only listed in datasets once all of its rows are committed, so
+other processes never see a partly written one.
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+
+import pandas as pd
+
+from utils.aggregation import AGGREGATE_COLUMNS
+from utils.schema import REQUIRED_COLUMNS
+from utils.search import KPISearchIndex
+
+# Path of the SQLite database (unset: datasets are only held in memory)
+SQLITE_PATH = os.environ.get("KPI_SQLITE_PATH") or None
+
+# Rows inserted per executemany call
+INSERT_BATCH_ROWS = 50_000
+
+# Opened datasets (period choices, KPI search index) kept per process
+MAX_OPEN_DATASETS = 8
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    fingerprint TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    periods TEXT NOT NULL,
+    memory_report TEXT,
+    load_report TEXT
+);
+CREATE TABLE IF NOT EXISTS kpi_rows (
+    dataset TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    kpi_id,
+    kpi_name TEXT,
+    department TEXT,
+    month INTEGER,
+    quarter INTEGER,
+    year INTEGER,
+    value REAL,
+    data_type TEXT
+);
+CREATE INDEX IF NOT EXISTS kpi_rows_period ON kpi_rows (dataset, year, month);
+CREATE INDEX IF NOT EXISTS kpi_rows_department ON kpi_rows (dataset, department);
+CREATE INDEX IF NOT EXISTS kpi_rows_kpi ON kpi_rows (dataset, kpi_id);
+"""
+
+# Period filter of each period type; the rollup cube uses the same rules
+_PERIOD_FILTERS = {
+    "monthly": "year = ? AND month = ?",
+    "quarterly": "year = ? AND quarter = ?",
+    "half_annual": "year = ? AND month BETWEEN ? AND ?",
+    "annually": "year = ?",
+}
+
+# Percentages are averaged and numbers summed; data_type is taken from the
+# group's first row (SQLite returns bare columns from the MIN(seq) row).
+# Every period filter starts with the year, so the (dataset, year, month)
+# index is forced; the planner otherwise picks the department index for the
+# GROUP BY and scans the whole dataset.
+_AGGREGATE_QUERY = """
+SELECT department, kpi_name,
+       CASE WHEN data_type = 'percentage' THEN AVG(value) ELSE TOTAL(value) END AS value,
+       data_type, MIN(seq) AS first_seq
+FROM kpi_rows INDEXED BY kpi_rows_period
+WHERE dataset = ? AND {period}
+GROUP BY department, kpi_name
+HAVING department IS NOT NULL AND kpi_name IS NOT NULL
+ORDER BY department, kpi_name
+"""
+
+_ROWS_QUERY = "SELECT {columns} FROM kpi_rows INDEXED BY kpi_rows_period WHERE dataset = ? AND {period} ORDER BY seq"
+
+# Department / KPI filters, each bound as one JSON array so any number of names fits in a single parameter
+_DEPARTMENT_FILTER = " AND department IN (SELECT value FROM json_each(?))"
+_KPI_FILTER = " AND kpi_name IN (SELECT value FROM json_each(?))"
+
+
+def _kpi_filter(sql_filter, params, departments, kpi_names):
+    """Add the department / KPI name conditions to a period filter and its parameters"""
+    if departments is not None:
+        sql_filter += _DEPARTMENT_FILTER
+        params += (json.dumps(list(departments)),)
+    if kpi_names is not None:
+        sql_filter += _KPI_FILTER
+        params += (json.dumps(list(kpi_names)),)
+    return sql_filter, params
+
+
+def _period_params(period_type, year, period):
+    if period_type == "half_annual":
+        return (year, 1, 6) if period == 1 else (year, 7, 12)
+    if period_type == "annually":
+        return (year,)
+    return (year, period)
+
+
+def _as_int(value):
+    """Whole-number period values as int, anything else (text, NULL) as None"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else None
+
+
+class StoredPeriodIndex:
+    """Year/month/quarter choices of a stored dataset, as offered by PeriodIndex"""
+
+    def __init__(self, periods):
+        # periods: distinct (year, month, quarter) values of the dataset's rows
+        periods = [tuple(_as_int(value) for value in period) for period in periods]
+        self.years = sorted({year for year, _, _ in periods if year is not None and year >= 0})
+        self.months_by_year = {year: [] for year in self.years}
+        self.quarters_by_year = {year: [] for year in self.years}
+        for year, month, quarter in periods:
+            if year not in self.months_by_year:
+                continue
+            if month is not None and 1 <= month <= 12 and month not in self.months_by_year[year]:
+                self.months_by_year[year].append(month)
+            if quarter is not None and quarter not in self.quarters_by_year[year]:
+                self.quarters_by_year[year].append(quarter)
+        for year in self.years:
+            self.months_by_year[year].sort()
+            self.quarters_by_year[year].sort()
+
+    def months(self, year):
+        return self.months_by_year.get(year, [])
+
+    def quarters(self, year):
+        return self.quarters_by_year.get(year, [])
+
+    def period_keys(self):
+        """Keys of every period with rows, in the form of rollup cube keys"""
+        for year in self.years:
+            yield ("annually", year, None)
+            for month in self.months(year):
+                yield ("monthly", year, month)
+            for quarter in self.quarters(year):
+                yield ("quarterly", year, quarter)
+            for half in sorted({1 if month <= 6 else 2 for month in self.months(year)}):
+                yield ("half_annual", year, half)
+
+
+class StoredDataset:
+    """
+    A dataset served from the SQLite store; the KPIDataset interface without the in-memory table.
+
+    df is None: period frames are queried on demand and nothing is cached
+    here (the per-session result memo already keeps recent results).
+    Department / KPI filters become part of the query.
+    """
+
+    df = None
+
+    def __init__(self, store, fingerprint, rows, memory_report, load_report, periods, kpis):
+        self.store = store
+        self.fingerprint = fingerprint
+        self.rows = rows
+        self.memory_report = memory_report
+        self.load_report = load_report
+        self.index = StoredPeriodIndex(periods)
+        self.kpi_index = KPISearchIndex([dept for dept, _ in kpis], [name for _, name in kpis])
+
+    def __len__(self):
+        return self.rows
+
+    def period_data(self, period_type, year, period=None, departments=None, kpi_names=None):
+        """Rows for one period: exact rows for months, aggregates otherwise; optionally only some KPIs"""
+        if period_type == "annually":
+            period = None
+        sql_filter, params = _kpi_filter(_PERIOD_FILTERS[period_type],
+                                         (self.fingerprint,) + _period_params(period_type, year, period),
+                                         departments, kpi_names)
+        if period_type == "monthly":
+            query = _ROWS_QUERY.format(columns=", ".join(REQUIRED_COLUMNS), period=sql_filter)
+            return self.store.query(query, params)
+        query = _AGGREGATE_QUERY.format(period=sql_filter)
+        return self.store.query(query, params)[AGGREGATE_COLUMNS]
+
+    def period_keys(self):
+        return self.index.period_keys()
+
+    def year_rows(self, first_year, last_year, departments=None, kpi_names=None):
+        """Rows of the years first_year through last_year, optionally only of some KPIs"""
+        sql_filter, params = _kpi_filter("year BETWEEN ? AND ?", (self.fingerprint, first_year, last_year),
+                                         departments, kpi_names)
+        query = _ROWS_QUERY.format(columns=", ".join(REQUIRED_COLUMNS), period=sql_filter)
+        return self.store.query(query, params)
+
+
+class KPIStore:
+    """SQLite database of ingested datasets, safe to share between threads and processes"""
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._opened = OrderedDict()  # fingerprint -> StoredDataset
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            # WAL lets sessions read while another process is writing a dataset
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # One short-lived connection per call: sqlite3 connections are not shared across threads
+        return closing(sqlite3.connect(self.path, timeout=60))
+
+    def query(self, sql, params=()):
+        with self._connect() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def open(self, fingerprint):
+        """The stored dataset for a fingerprint, or None if it has not been saved"""
+        with self._lock:
+            if fingerprint in self._opened:
+                self._opened.move_to_end(fingerprint)
+                return self._opened[fingerprint]
+        with self._connect() as conn:
+            found = conn.execute(
+                "SELECT rows, periods, memory_report, load_report FROM datasets WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            if found is None:
+                return None
+            kpis = conn.execute(
+                "SELECT DISTINCT department, kpi_name FROM kpi_rows "
+                "WHERE dataset = ? AND department IS NOT NULL AND kpi_name IS NOT NULL", (fingerprint,)
+            ).fetchall()
+        rows, periods, memory_report, load_report = found
+        # Stored datasets never change, so the opened one (with its search index) is reused
+        dataset = StoredDataset(self, fingerprint, rows, json.loads(memory_report or "{}"),
+                                json.loads(load_report or "{}"), json.loads(periods), kpis)
+        with self._lock:
+            self._opened[fingerprint] = dataset
+            while len(self._opened) > MAX_OPEN_DATASETS:
+                self._opened.popitem(last=False)
+        return dataset
+
+    def save(self, dataset):
+        """Store an in-memory KPIDataset under its fingerprint (no-op if it is already stored)"""
+        table = dataset.df[REQUIRED_COLUMNS]
+        columns = [table[col].astype(object).where(table[col].notna(), None).tolist() for col in REQUIRED_COLUMNS]
+        periods = sorted(set(zip(*(columns[REQUIRED_COLUMNS.index(col)] for col in ('year', 'month', 'quarter')))),
+                         key=repr)
+        with self._connect() as conn:
+            conn.isolation_level = None
+            # IMMEDIATE takes the write lock up front, so two processes never store the same data twice
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("SELECT 1 FROM datasets WHERE fingerprint = ?", (dataset.fingerprint,)).fetchone():
+                    conn.execute("ROLLBACK")
+                    return False
+                for start in range(0, len(table), INSERT_BATCH_ROWS):
+                    stop = start + INSERT_BATCH_ROWS
+                    conn.executemany(
+                        "INSERT INTO kpi_rows (dataset, seq, " + ", ".join(REQUIRED_COLUMNS) + ") "
+                        "VALUES (?, ?" + ", ?" * len(REQUIRED_COLUMNS) + ")",
+                        ((dataset.fingerprint, seq) + values
+                         for seq, values in enumerate(zip(*(col[start:stop] for col in columns)), start)),
+                    )
+                conn.execute(
+                    "INSERT INTO datasets (fingerprint, rows, periods, memory_report, load_report) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (dataset.fingerprint, len(table), json.dumps(periods, default=str),
+                     json.dumps(dataset.memory_report, default=str), json.dumps(dataset.load_report, default=str)),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return True
+
@@ -0,0 +1,180 @@
+"""
+Vectorized synthetic KPI data.
+
+Each KPI follows one of the eight profiles of the original sample (revenue
+with a holiday boost, satisfaction percentages clipped to a range, ...).
+Values for a whole block of months are computed with array operations from a
+single draw of standard normals. The draws are taken in the same order as
+the original per-row loop, so the default settings reproduce
+sample_kpi_data.xlsx exactly.
+
+Data is produced in chunks of whole months, so tables far larger than memory
+can be written to Excel (split over several sheets) or Parquet.
+"""
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+
+# name, department, data_type, base value, change per year, Nov/Dec factor,
+# noise ("relative" multiplies by N(1, sigma), "absolute" adds N(0, sigma)), sigma, lower/upper bound
+KPI_PROFILES = [
+    ("Revenue", "Sales", "number", 50000, 10000, 1.2, "relative", 0.1, None, None),
+    ("Customer Satisfaction", "Customer Service", "percentage", 80, 2, 1.0, "absolute", 3, 70, 95),
+    ("Sales Volume", "Sales", "number", 1000, 200, 1.3, "relative", 0.15, None, None),
+    ("Website Traffic", "Marketing", "number", 25000, 5000, 1.0, "relative", 0.2, None, None),
+    ("Conversion Rate", "Marketing", "percentage", 4, 0.5, 1.0, "absolute", 0.5, 2, 8),
+    ("Employee Satisfaction", "HR", "percentage", 75, 1, 1.0, "absolute", 2, 60, 90),
+    ("Production Efficiency", "Operations", "percentage", 80, 2, 1.0, "absolute", 3, 70, 95),
+    ("Cost per Acquisition", "Marketing", "number", 50, -5, 1.0, "relative", 0.1, 20, None),
+]
+
+DEFAULT_SEED = 42
+DEFAULT_START_YEAR = 2022
+DEFAULT_YEARS = 3
+
+# Rows generated per chunk (rounded to whole months)
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+# Data rows per Excel sheet; a sheet holds at most 1,048,576 rows including the header
+EXCEL_SHEET_ROWS = 1_000_000
+
+# Named benchmark datasets: total rows and number of departments
+DATASET_SIZES = {
+    "10k": (10_000, 10),
+    "100k": (100_000, 25),
+    "1m": (1_000_000, 50),
+    "10m": (10_000_000, 100),
+    "50m": (50_000_000, 200),
+}
+
+COLUMNS = ['kpi_id', 'kpi_name', 'department', 'month', 'quarter', 'year', 'value', 'data_type']
+
+
+def kpis_for_rows(rows, years=DEFAULT_YEARS):
+    """Number of KPIs needed for at least `rows` rows over `years` years of months"""
+    return max(1, math.ceil(rows / (years * 12)))
+
+
+def kpi_catalog(kpis=len(KPI_PROFILES), departments=None):
+    """
+    One row per KPI with its name, department, data type and profile parameters.
+
+    KPIs cycle through the profiles; repeats get a numeric suffix. Without
+    `departments` each KPI keeps its profile's department, otherwise KPIs are
+    dealt round-robin over that many departments.
+    """
+    profiles = pd.DataFrame(KPI_PROFILES, columns=['kpi_name', 'department', 'data_type', 'base', 'growth',
+                                                   'seasonal', 'noise', 'sigma', 'lower', 'upper'])
+    ids = np.arange(kpis)
+    catalog = profiles.iloc[ids % len(profiles)].reset_index(drop=True)
+    catalog.insert(0, 'kpi_id', ids + 1)
+
+    repeat = ids // len(profiles)
+    if kpis > len(profiles):
+        suffix = np.where(repeat > 0, " " + (repeat + 1).astype(str).astype(object), "")
+        catalog['kpi_name'] = catalog['kpi_name'] + suffix
+    if departments is not None:
+        names = list(dict.fromkeys(profile[1] for profile in KPI_PROFILES))
+        names += [f"Department {i + 1}" for i in range(len(names), departments)]
+        catalog['department'] = np.array(names[:departments], dtype=object)[ids % departments]
+
+    catalog['lower'] = catalog['lower'].astype(float).fillna(-np.inf)
+    catalog['upper'] = catalog['upper'].astype(float).fillna(np.inf)
+    return catalog
+
+
+def iter_kpi_chunks(kpis=len(KPI_PROFILES), departments=None, start_year=DEFAULT_START_YEAR,
+                    years=DEFAULT_YEARS, seed=DEFAULT_SEED, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yield the KPI table in chunks of whole months, in (year, month, kpi) order.
+
+    Label columns are categoricals with the same categories in every chunk.
+    """
+    catalog = kpi_catalog(kpis, departments)
+    labels = {col: pd.Categorical(catalog[col]) for col in ['kpi_name', 'department', 'data_type']}
+    base = catalog['base'].to_numpy(float)
+    growth = catalog['growth'].to_numpy(float)
+    seasonal = catalog['seasonal'].to_numpy(float)
+    sigma = catalog['sigma'].to_numpy(float)
+    relative = (catalog['noise'] == "relative").to_numpy()
+    lower, upper = catalog['lower'].to_numpy(), catalog['upper'].to_numpy()
+
+    # The legacy global-state generator: same draws, in the same order, as np.random.seed + np.random.normal
+    random = np.random.RandomState(seed)
+    periods = years * 12
+    months_per_chunk = max(1, chunk_rows // kpis)
+    for first in range(0, periods, months_per_chunk):
+        period = np.arange(first, min(first + months_per_chunk, periods))
+        year_offset = (period // 12)[:, None]
+        month = (period % 12 + 1)[:, None]
+
+        noise = random.standard_normal((len(period), kpis))
+        trend = base + year_offset * growth
+        boosted = trend * np.where(month >= 11, seasonal, 1.0)
+        values = np.where(relative, boosted * (1.0 + sigma * noise), trend + sigma * noise)
+        values = np.round(np.clip(values, lower, upper), 2)
+
+        chunk = pd.DataFrame({
+            'kpi_id': np.tile(catalog['kpi_id'].to_numpy(), len(period)),
+            'kpi_name': labels['kpi_name'][np.tile(np.arange(kpis), len(period))],
+            'department': labels['department'][np.tile(np.arange(kpis), len(period))],
+            'month': np.repeat(month.ravel(), kpis),
+            'quarter': np.repeat((month.ravel() - 1) // 3 + 1, kpis),
+            'year': np.repeat(start_year + year_offset.ravel(), kpis),
+            'value': values.ravel(),
+            'data_type': labels['data_type'][np.tile(np.arange(kpis), len(period))],
+        })
+        yield chunk
+
+
+def generate_kpi_data(**settings):
+    """The whole synthetic table in memory; see iter_kpi_chunks for the settings"""
+    return pd.concat(iter_kpi_chunks(**settings), ignore_index=True)
+
+
+def write_excel(chunks, path, sheet_rows=EXCEL_SHEET_ROWS):
+    """Stream chunks into an .xlsx file, starting a new sheet every sheet_rows rows; returns the row count"""
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet, sheet_count, in_sheet, total = None, 0, sheet_rows, 0
+    for chunk in chunks:
+        columns = [chunk[col].astype(object).to_numpy() if isinstance(chunk[col].dtype, pd.CategoricalDtype)
+                   else chunk[col].to_numpy() for col in COLUMNS]
+        rows = zip(*(col.tolist() for col in columns))
+        written = 0
+        while written < len(chunk):
+            if in_sheet >= sheet_rows:
+                sheet_count += 1
+                sheet = workbook.create_sheet(f"Sheet{sheet_count}")
+                sheet.append(COLUMNS)
+                in_sheet = 0
+            take = min(sheet_rows - in_sheet, len(chunk) - written)
+            for row in itertools.islice(rows, take):
+                sheet.append(row)
+            in_sheet += take
+            written += take
+        total += len(chunk)
+    workbook.save(path)
+    return total
+
+
+def write_parquet(chunks, path):
+    """Stream chunks into a Parquet file (label columns dictionary-encoded); returns the row count"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer, total = None, 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            total += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
@@ -0,0 +1,116 @@
+"""
+Multi-period (trend) comparison of KPI values.
+
+Instead of comparing periods pairwise, every selected period is aggregated
+in one groupby over the KPI table and pivoted into a department/KPI x period
+matrix. Period-over-period and year-over-year changes are then computed for
+all columns at once by shifting the matrix.
+
+Periods are addressed by an ordinal, year * periods_per_year + period - 1,
+so the previous period is ordinal - 1 and the same period a year earlier is
+ordinal - periods_per_year, whatever periods were selected.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.aggregation import aggregate_by_data_type
+from utils.comparison import change_percent
+from utils.rollups import period_name
+
+PERIODS_PER_YEAR = {"monthly": 12, "quarterly": 4, "half_annual": 2, "annually": 1}
+
+# Periods preselected in the trend view: a year of months, three years of quarters, ...
+DEFAULT_TREND_PERIODS = {"monthly": 12, "quarterly": 12, "half_annual": 6, "annually": 5}
+
+CHANGE_BASES = ["pop", "yoy"]
+CHANGE_BASIS_LABELS = {"pop": "Period over period", "yoy": "Year over year"}
+
+TREND_CSV_COLUMNS = ['department', 'kpi_name', 'period', 'value', 'pop_change_percent', 'yoy_change_percent']
+
+
+def period_ordinal(period_type, year, period):
+    """Position of a period on a continuous timeline of its period type"""
+    if period_type == "annually":
+        return year
+    return year * PERIODS_PER_YEAR[period_type] + period - 1
+
+
+def trend_periods(cube, period_type):
+    """Every (year, period) of a period type present in a rollup cube, oldest first"""
+    per_year = PERIODS_PER_YEAR[period_type]
+    periods = []
+    for key in cube:
+        if key[0] != period_type or key[1] < 0:
+            continue
+        if period_type == "annually" or 1 <= key[2] <= per_year:
+            periods.append((key[1], key[2]))
+    return sorted(periods, key=lambda p: period_ordinal(period_type, *p))
+
+
+def _row_ordinals(df, period_type):
+    """Ordinal of every row's period, -1 for rows outside any valid period"""
+    years = pd.to_numeric(df['year'], errors='coerce').fillna(-1).to_numpy(np.int64)
+    if period_type == "annually":
+        return np.where(years >= 0, years, -1)
+
+    months = pd.to_numeric(df['month'], errors='coerce').fillna(-1).to_numpy(np.int64)
+    if period_type == "monthly":
+        periods = months
+    elif period_type == "quarterly":
+        periods = pd.to_numeric(df['quarter'], errors='coerce').fillna(-1).to_numpy(np.int64)
+    else:
+        # Same 1-6 / 7-12 split as the rollup cube
+        periods = np.select([(months >= 1) & (months <= 6), (months >= 7) & (months <= 12)], [1, 2], -1)
+
+    valid = (years >= 0) & (periods >= 1) & (periods <= PERIODS_PER_YEAR[period_type])
+    return np.where(valid, years * PERIODS_PER_YEAR[period_type] + periods - 1, -1)
+
+
+def compare_trend(df, period_type, periods):
+    """
+    Values and changes of every KPI over a list of (year, period) pairs.
+
+    Returns a dict with the period 'labels' (oldest first) and three frames
+    indexed by department/KPI with one column per label: 'values', 'pop'
+    (change % against the previous selected period) and 'yoy' (change % against
+    the same period a year earlier, when it is selected too). KPIs that appear
+    in any selected period are kept; missing values are NaN. Aggregation
+    follows the rollup cube, so a month holding one row per KPI keeps its
+    exact values.
+    """
+    ordinals = sorted({period_ordinal(period_type, year, period) for year, period in periods})
+    by_ordinal = {period_ordinal(period_type, year, period): (year, period) for year, period in periods}
+    labels = [period_name(period_type, *by_ordinal[o]) for o in ordinals]
+
+    row_ordinals = _row_ordinals(df, period_type)
+    selected = np.isin(row_ordinals, ordinals)
+    stats = aggregate_by_data_type(df[selected].assign(ordinal=row_ordinals[selected]), ['ordinal'])
+
+    # One pivot to a department/KPI x period matrix, columns in timeline order
+    values = stats.pivot(index=['department', 'kpi_name'], columns='ordinal', values='value')
+    values = values.reindex(columns=ordinals).astype(float)
+
+    pop = change_percent(values.shift(1, axis=1), values)
+    prior_year = values.reindex(columns=[o - PERIODS_PER_YEAR[period_type] for o in ordinals])
+    prior_year.columns = values.columns
+    yoy = change_percent(prior_year, values)
+
+    for frame in (values, pop, yoy):
+        frame.columns = labels
+        frame.columns.name = None
+    return {'labels': labels, 'values': values, 'pop': pop, 'yoy': yoy}
+
+
+def trend_csv_frame(trend):
+    """Long format of a trend: one row per KPI and period in which it has a value"""
+    values = trend['values']
+    periods = len(trend['labels'])
+    long = pd.DataFrame({
+        'department': np.repeat(values.index.get_level_values('department').to_numpy(), periods),
+        'kpi_name': np.repeat(values.index.get_level_values('kpi_name').to_numpy(), periods),
+        'period': np.tile(trend['labels'], len(values)),
+        'value': values.to_numpy().ravel(),
+        'pop_change_percent': trend['pop'].to_numpy().ravel(),
+        'yoy_change_percent': trend['yoy'].to_numpy().ravel(),
+    })
+    return long[long['value'].notna()].reset_index(drop=True)
@@ -0,0 +1,187 @@
+"""
+Row-level validation of the KPI table.
+
+Rows that pass the column checks can still be wrong: a month 13, a quarter
+that does not match its month, a value that is not a number or is empty, a
+data_type other than "percentage"/"number", or a KPI whose data_type changes
+between rows. Such rows otherwise end up in the wrong period or are averaged
+when they should be summed, without any error. Every check is one array
+operation over the whole table, so the pass is cheap enough to run on every
+upload.
+
+Problems do not stop a load. After validation, usable_rows turns values that
+are not numbers into NaN, like empty cells, and leaves out the rows without a
+numeric year, month and quarter, which belong to no period.
+
+The report counts the problem rows of each check and lists the first
+MAX_REPORTED_ROWS of them with the file, sheet and spreadsheet row they came
+from (the header being row 1).
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+VALID_DATA_TYPES = ["percentage", "number"]
+
+CHECK_LABELS = {
+    'month': "Month is not a whole number from 1 to 12",
+    'quarter': "Quarter does not match the month",
+    'non_numeric': "Value, year, month or quarter is not a number",
+    'missing': "Value, year, month or quarter is empty",
+    'data_type': 'data_type is not "percentage" or "number"',
+    'data_type_changed': "KPI's data_type differs from its first row",
+}
+
+# Problem rows listed per check; the counts always cover every row
+MAX_REPORTED_ROWS = 200
+
+# Spreadsheet row of the first data row (row 1 holds the column names)
+FIRST_DATA_ROW = 2
+
+NUMERIC_COLUMNS = ['value', 'year', 'month', 'quarter']
+PERIOD_COLUMNS = ['year', 'month', 'quarter']
+
+
+def _as_numbers(series):
+    """(float array, mask of non-empty cells that are not numbers)"""
+    if pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.to_numpy(dtype=float, na_value=np.nan), np.zeros(len(series), dtype=bool)
+    numbers = pd.to_numeric(series.astype(object), errors='coerce')
+    return numbers.to_numpy(dtype=float, na_value=np.nan), (numbers.isna() & series.notna()).to_numpy()
+
+
+def _locate(positions, sources):
+    """(file, sheet, spreadsheet row) of table positions, given the (file, sheet, rows) the table was built from"""
+    if not sources:
+        return [(None, None, int(position) + FIRST_DATA_ROW) for position in positions]
+    stops = np.cumsum([rows for _, _, rows in sources])
+    indices = np.searchsorted(stops, positions, side='right')
+    located = []
+    for position, index in zip(positions, indices):
+        file_name, sheet, rows = sources[index]
+        located.append((file_name, sheet, int(position - (stops[index] - rows)) + FIRST_DATA_ROW))
+    return located
+
+
+def _first_data_types(df, reference=None):
+    """
+    data_type of each row's KPI: its first valid one in reference if it has one there, else in df.
+
+    Unknown data types are reported by their own check and are skipped here,
+    so one mistyped row does not flag every other row of its KPI.
+    """
+    data_types = df['data_type'].astype(object)
+    data_types = data_types.where(data_types.isin(VALID_DATA_TYPES))
+    first = data_types.groupby(df['kpi_id'], sort=False, observed=True).transform('first')
+    if reference is not None and len(reference):
+        earliest = reference[reference['data_type'].isin(VALID_DATA_TYPES)].drop_duplicates('kpi_id')
+        known = pd.Series(earliest['data_type'].astype(object).to_numpy(),
+                          index=earliest['kpi_id'].astype(object).to_numpy())
+        earlier = df['kpi_id'].astype(object).map(known)
+        first = earlier.where(earlier.notna(), first)
+    return first
+
+
+def validate_kpi_table(df, sources=None, reference=None):
+    """
+    Check every row of a KPI table; returns a JSON-serialisable report.
+
+    sources are the (file, sheet, row count) blocks the table was concatenated
+    from, in order, and are used to turn positions into spreadsheet rows.
+    reference is a table df is appended to: KPIs it already holds must keep
+    their data_type there. The report has 'rows', 'seconds', 'counts' per check
+    and 'errors', a list of {check, file, sheet, row, column, value, problem},
+    and 'rows_left_out', the rows usable_rows drops for lack of a period.
+    """
+    start = time.perf_counter()
+    masks = {}
+
+    numbers = {col: _as_numbers(df[col]) for col in NUMERIC_COLUMNS}
+    months, bad_months = numbers['month']
+    quarters, bad_quarters = numbers['quarter']
+    bad_years = numbers['year'][1]
+    bad_values = numbers['value'][1]
+
+    valid_month = (months >= 1) & (months <= 12) & (months == np.floor(months))
+    masks['month'] = ~valid_month & ~np.isnan(months), 'month'
+    # Only months that are valid themselves have an expected quarter
+    expected_quarters = np.floor((months - 1) / 3) + 1
+    masks['quarter'] = valid_month & ~np.isnan(quarters) & (quarters != expected_quarters), 'quarter'
+    for col, bad in (('value', bad_values), ('year', bad_years), ('month', bad_months), ('quarter', bad_quarters)):
+        masks[f'non_numeric:{col}'] = bad, col
+    # Empty cells are read as NaN; values among them are silently left out of sums and averages
+    for col in NUMERIC_COLUMNS:
+        masks[f'missing:{col}'] = np.isnan(numbers[col][0]) & ~numbers[col][1], col
+    left_out = np.zeros(len(df), dtype=bool)
+    for col in PERIOD_COLUMNS:
+        left_out |= np.isnan(numbers[col][0])
+
+    data_types = df['data_type']
+    known_type = data_types.isin(VALID_DATA_TYPES).to_numpy()
+    masks['data_type'] = ~known_type & data_types.notna().to_numpy(), 'data_type'
+    first_types = _first_data_types(df, reference)
+    masks['data_type_changed'] = known_type & (data_types.astype(object) != first_types).to_numpy(), 'data_type'
+
+    counts = {check: 0 for check in CHECK_LABELS}
+    errors = []
+    for name, (mask, col) in masks.items():
+        check = name.split(':')[0]
+        positions = np.flatnonzero(mask)
+        counts[check] += len(positions)
+        reported = sum(1 for error in errors if error['check'] == check)
+        positions = positions[:max(MAX_REPORTED_ROWS - reported, 0)]
+        cells = df[col].iloc[positions].astype(object).tolist()
+        for (file_name, sheet, row), position, cell in zip(_locate(positions, sources), positions, cells):
+            problem = CHECK_LABELS[check]
+            if check == 'quarter':
+                problem = f"Quarter should be {int(expected_quarters[position])} for month {int(months[position])}"
+            elif check == 'data_type_changed':
+                problem = f"KPI {df['kpi_id'].iloc[position]} was \"{first_types.iloc[position]}\" in its first row"
+            errors.append({'check': check, 'file': file_name, 'sheet': sheet, 'row': row, 'column': col,
+                           'value': "" if pd.isna(cell) else str(cell), 'problem': problem})
+
+    return {
+        'rows': len(df),
+        'seconds': time.perf_counter() - start,
+        'counts': counts,
+        'errors': errors,
+        'rows_left_out': int(left_out.sum()),
+    }
+
+
+def usable_rows(df):
+    """
+    The table with every value a number and every row in a period, for the rollups.
+
+    Values that are not numbers become NaN, and rows whose year, month or
+    quarter is empty or not a number are left out. Returns df itself when
+    nothing needs to change.
+    """
+    numeric = {col: pd.to_numeric(df[col].astype(object), errors='coerce')
+               for col in NUMERIC_COLUMNS if not pd.api.types.is_numeric_dtype(df[col])}
+    if not numeric and not df[PERIOD_COLUMNS].isna().any().any():
+        return df
+    df = df.assign(**numeric)
+    return df[df[PERIOD_COLUMNS].notna().all(axis=1)].reset_index(drop=True)
+
+
+def error_count(report):
+    """Problem rows of a validation report (a row failing two checks counts twice)"""
+    return sum(report['counts'].values())
+
+
+def merge_reports(reports):
+    """One report for tables that were validated separately, e.g. loaded data and an appended month"""
+    counts = {check: sum(report['counts'].get(check, 0) for report in reports) for check in CHECK_LABELS}
+    errors = []
+    for check in CHECK_LABELS:
+        listed = [error for report in reports for error in report['errors'] if error['check'] == check]
+        errors.extend(listed[:MAX_REPORTED_ROWS])
+    return {
+        'rows': sum(report['rows'] for report in reports),
+        'seconds': sum(report['seconds'] for report in reports),
+        'counts': counts,
+        'errors': errors,
+        'rows_left_out': sum(report.get('rows_left_out', 0) for report in reports),
+    }